@@ -1,15 +1,17 @@
 # app.py — Luna Social (Hybrid, Clean, Explainable Version)
 
 import os
+import time
+import uuid
+import functools
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import requests
+from requests.adapters import HTTPAdapter
 
 from dotenv import load_dotenv
 
@@ -40,6 +42,18 @@ ENABLE_GROUPS = os.getenv("ENABLE_GROUPS", "True") == "True"
 ENABLE_MAPS = os.getenv("ENABLE_MAPS", "True") == "True"
 ENABLE_ANALYTICS = os.getenv("ENABLE_ANALYTICS", "True") == "True"
 
+# Posts rendered per Home feed page
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "5"))
+
+# Buffered interactions are flushed once per rerun, or early when this many pile up
+INTERACTION_FLUSH_SIZE = int(os.getenv("INTERACTION_FLUSH_SIZE", "20"))
+
+# Chat messages rendered per conversation; "Load earlier" grows the window by this much
+MSG_PAGE_SIZE = int(os.getenv("MSG_PAGE_SIZE", "20"))
+
+# Bookings listed before "Show older bookings"
+BOOKINGS_PAGE_SIZE = int(os.getenv("BOOKINGS_PAGE_SIZE", "10"))
+
 # =========================================================
 # 2. STREAMLIT CONFIG & STYLES
 # =========================================================
@@ -92,6 +106,71 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# Static Analytics copy; rendered inside collapsed expanders on that page
+_PIPELINE_MD = """
+#### 🧠 End-to-End Pipeline
+
+**1. Behavioral Signal Processing**
+- Track view duration → attention score  
+- Likes / Saves / Visits → preference label  
+- Category engagement computed dynamically  
+
+**2. Venue Feature Vector**
+`[rating, distance, trending, category_score, capacity]` normalized per venue  
+
+**3. Hybrid Ranking Model**
+- Heuristic weighted score  
+- RandomForest ML Ranker  
+- Final score = **0.5 ML + 0.5 heuristic**  
+
+**4. LLM Agent Understanding**
+- Gemini extracts:  
+  - Vibe (romantic, calm, adventure…)  
+  - Cuisine preference (Italian, Japanese…)  
+  - Budget  
+  - Mood score (0–100)  
+- These constraints further filter ML suggestions  
+
+**5. Fallback & Robustness**
+- If vibe/cuisine filtering empties the list → return top ML-ranked venues  
+- Always guarantees minimum 3 results  
+
+**6. Itinerary Generation**
+- Auto 6 PM → 8 PM → 10 PM route  
+- Based on filtered best venues  
+
+"""
+
+_REQUIREMENTS_MD = """
+**Track 2 Backend Requirements Mapping:**  
+
+- ✅ **Recommendation Engine**  
+   - Machine Learning hybrid scoring  
+   - Uses behavioral interaction signals  
+   - Spatial distance + trending + rating + preference vectors  
+   - ML Ranker trained on user interaction logs  
+
+- ✅ **Spatial Analysis**  
+   - Haversine distance → used in scoring  
+
+- ✅ **Social Compatibility**  
+   - Group chat LLM analysis  
+   - Group vibe / cuisine / budget factor into final recs  
+
+- ✅ **AI Agents**  
+   - LLM Intent Parsing (Gemini 2.5 Flash)  
+   - Automated multi-step itinerary generation  
+   - Booking simulation + QR codes  
+
+- ✅ **Full System Insight**  
+   - Analytics dashboard displays:   
+      * User engagement  
+      * Feature vectors  
+      * Model weights  
+      * LLM extraction outputs  
+      * Pipeline visualization  
+"""
+
 # =========================================================
 # 3. SESSION STATE & SYSTEM INITIALIZATION
 # =========================================================
@@ -100,50 +179,233 @@ if "luna_system" not in st.session_state:
     # NOTE: backend.LunaSystem internally creates LunaDatabase("luna_social.db")
     # If you want to force DATABASE_PATH, you’d adjust backend; here we just show it.
     system = LunaSystem(GEMINI_API_KEY if ENABLE_AI_AGENT else "")
-    system.initialize_with_demo_data()
+    # Populate demo data off the first-render critical path; pages wait on system.initialized
+    init_thread = threading.Thread(target=system.initialize_with_demo_data, daemon=True)
+    init_thread.start()
     st.session_state.luna_system = system
+    st.session_state.init_thread = init_thread
     st.session_state.current_user_id = "user_000"
     st.session_state.chat_history = []          # For Luna AI chat
     st.session_state.booking_venue = None       # Preselected booking venue
     st.session_state.selected_dm_user = None    # For DM chat
     st.session_state.selected_group = None      # For group chat
+    st.session_state.feed_page = 0              # Home feed pagination
+    st.session_state.pending_interactions = []  # Write-behind interaction buffer
+    st.session_state.msg_window = MSG_PAGE_SIZE # Chat messages rendered per conversation
+    st.session_state.msg_cache = {}             # Rendered chat rows per conversation
+    st.session_state.bookings_shown = BOOKINGS_PAGE_SIZE  # Bookings page list window
 else:
     system = st.session_state.luna_system
 
+if not system.initialized:
+    st.title(f"🌙 {APP_NAME}")
+    # Re-check after is_alive(): the thread may have finished between the two reads
+    if not st.session_state.init_thread.is_alive() and not system.initialized:
+        # Drop the failed system so the next rerun builds a fresh one and retries
+        del st.session_state.luna_system
+        del st.session_state.init_thread
+        st.error("Demo data initialization failed — check the server logs.")
+        st.button("Retry")
+        st.stop()
+    with st.spinner("Preparing demo data (users, venues, posts)..."):
+        time.sleep(0.5)
+    st.rerun()
+
 # Convenience handles
 db = system.db
 rec_engine = system.rec_engine
 ai_agent = system.ai_agent
 booking_manager = system.booking_manager
 
-current_user: User = db.get_user(st.session_state.current_user_id)
+# Request-scoped lookup cache: reset on every script run, so the same user or
+# venue read by several sections of one rerun is fetched once without any
+# st.cache_data staleness to manage
+st.session_state._req = {}
+
+
+def _request_cached(key: tuple, fetch):
+    cache = st.session_state._req
+    if key not in cache:
+        cache[key] = fetch()
+    return cache[key]
+
+
+def cached_get_user(user_id: str):
+    return _request_cached(("user", user_id), lambda: db.get_user(user_id))
+
+
+def cached_get_venue(venue_id: str):
+    return _request_cached(("venue", venue_id), lambda: db.get_venue(venue_id))
+
+
+current_user: User = cached_get_user(st.session_state.current_user_id)
 
 # =========================================================
 # 4. HELPER FUNCTIONS
 # =========================================================
 
+@functools.lru_cache(maxsize=4096)
+def format_dt(dt: datetime, fmt: str) -> str:
+    """Memoized strftime; timestamps are immutable so the result never changes."""
+    return dt.strftime(fmt)
+
+
+@functools.lru_cache(maxsize=1024)
+def format_iso(value: str, fmt: str) -> str:
+    """Memoized fromisoformat + strftime for ISO strings stored in the DB."""
+    return datetime.fromisoformat(value).strftime(fmt)
+
+
+@st.cache_data(ttl=30)
+def _get_comments_cached(post_ids: tuple, per_post: int = 5):
+    """Cached db.get_comments_bulk; cleared whenever a comment is added."""
+    return db.get_comments_bulk(list(post_ids), per_post=per_post)
+
+
+@st.cache_data(ttl=30)
+def _get_posts_cached(limit: int = 20, offset: int = 0):
+    """Cached db.get_posts; cleared whenever a post is liked."""
+    return db.get_posts(limit=limit, offset=offset)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _recommend_venues_cached(user_id: str, interaction_version: int, limit: int = 10):
+    """recommend_venues memoized per (user, interaction count); a new
+    interaction bumps the version and forces a recompute."""
+    return rec_engine.recommend_venues(user_id, limit=limit, show_reasoning=True)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_user_profile_cached(user_id: str, interaction_version: int):
+    """build_user_profile memoized per (user, interaction count)."""
+    return rec_engine.build_user_profile(user_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _recommend_users_cached(user_id: str, interaction_version: int, limit: int = 10):
+    """recommend_users memoized per (user, global interaction version); candidates'
+    profiles come from everyone's interactions, not just the target user's."""
+    return rec_engine.recommend_users(user_id, limit=limit)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _analyze_group_chat_cached(chat: tuple, user_id: str, interaction_version: int):
+    """analyze_group_chat (an LLM round-trip) memoized per chat content and user;
+    the interaction version keeps the underlying venue recs fresh."""
+    return ai_agent.analyze_group_chat(list(chat), user_id)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _saved_venues_fig(saved_ids: tuple):
+    """Saved-venues map figure; a pure function of the saved id tuple."""
+    import plotly.express as px  # deferred: only needed once a user has saved venues
+
+    venues_by_id = db.get_venues_bulk(saved_ids)
+    venues = []
+    for vid in saved_ids:
+        v = venues_by_id.get(vid)
+        if v:
+            venues.append({
+                "name": v.name,
+                "lat": v.location[0],
+                "lon": v.location[1],
+                "rating": v.rating,
+                "category": v.category.value,
+                "address": v.address
+            })
+
+    df = pd.DataFrame(venues)
+
+    fig = px.scatter_mapbox(
+        df,
+        lat="lat",
+        lon="lon",
+        hover_name="name",
+        hover_data=["category", "rating", "address"],
+        zoom=11,
+        height=450
+    )
+
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        margin=dict(l=0, r=0, t=0, b=0)
+    )
+    return fig
+
+
+# Shared keep-alive HTTP pool for feed images (avoids a TCP/TLS handshake per image)
+_http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_http_session.mount("https://", _http_adapter)
+_http_session.mount("http://", _http_adapter)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_image(url: str):
+    """Download image bytes through the pooled session; None if unavailable."""
+    try:
+        resp = _http_session.get(url, timeout=5)
+        resp.raise_for_status()
+        return resp.content
+    except requests.RequestException:
+        return None
+
+
+def _prefetch_images(urls):
+    """Warm the _fetch_image cache for a page of images in parallel."""
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_fetch_image, urls))
+
+
 def record_interaction(venue_id: str, interaction_type: InteractionType, duration: int = 0):
     """Record behavioral signals used by recommendation engine.
     
     Signals used:
     - VIEW: time spent, feed scroll
     - LIKE / SAVE / CLICK / VISIT: stronger preference signals
+
+    Interactions are buffered in session state and handed to the database's
+    background writer by flush_pending_interactions().
     """
     interaction = Interaction(
-        interaction_id=f"inter_{datetime.now().timestamp()}_{interaction_type.value}",
+        interaction_id=f"inter_{uuid.uuid4().hex}",
         user_id=st.session_state.current_user_id,
         venue_id=venue_id,
         interaction_type=interaction_type,
         duration_seconds=duration,
         timestamp=datetime.now(),
     )
-    db.insert_interaction(interaction)
+    buffer = st.session_state.pending_interactions
+    buffer.append(interaction)
+    if len(buffer) >= INTERACTION_FLUSH_SIZE:
+        flush_pending_interactions()
+
+
+def flush_pending_interactions(wait: bool = False):
+    """Queue buffered interactions for one batched background commit.
+
+    wait=True also blocks until every queued write has landed, for callers
+    about to read interactions back. A failed background write is reported
+    here; the backend keeps and retries its rows, and the buffer is kept too.
+    """
+    buffer = st.session_state.get("pending_interactions")
+    try:
+        if buffer:
+            db.insert_interactions_async(buffer)
+            buffer.clear()
+        if wait:
+            db.flush_writes()
+    except Exception as e:
+        st.warning(f"Couldn't save recent activity yet ({e}); it will be retried.")
 
 
 def create_booking(venue_id: str, booking_date: datetime, party_size: int, notes: str = "") -> Booking:
     """Create booking + QR using backend BookingManager (agent-like automation)."""
-    venue = db.get_venue(venue_id)
-    user = db.get_user(st.session_state.current_user_id)
+    venue = cached_get_venue(venue_id)
+    user = cached_get_user(st.session_state.current_user_id)
 
     booking = Booking(
         booking_id=BookingManager.generate_booking_id(),
@@ -162,15 +424,45 @@ def create_booking(venue_id: str, booking_date: datetime, party_size: int, notes
     return booking
 
 
+def create_bookings(venue_slots: list, party_size: int, notes: str = "") -> list:
+    """Create several bookings at once; venues are fetched in one query and
+    all bookings are written in a single transaction.
+
+    venue_slots: list of (venue_id, booking_date) pairs.
+    """
+    user = cached_get_user(st.session_state.current_user_id)
+    venues_by_id = db.get_venues_bulk([vid for vid, _ in venue_slots])
+
+    bookings = []
+    for venue_id, booking_date in venue_slots:
+        venue = venues_by_id.get(venue_id)
+        if not venue:
+            continue
+        booking = Booking(
+            booking_id=BookingManager.generate_booking_id(),
+            user_id=user.user_id,
+            venue_id=venue_id,
+            booking_date=booking_date,
+            party_size=party_size,
+            special_notes=notes,
+            status="confirmed",
+            created_at=datetime.now(),
+        )
+        booking.qr_code = BookingManager.create_qr_code(booking, user, venue)
+        bookings.append(booking)
+
+    db.bulk_insert_bookings(bookings)
+    user.bookings.extend(b.booking_id for b in bookings)
+    db.insert_user(user)
+    return bookings
+
+
 def toggle_post_like(post: Post):
     """Increment likes on a post and record a LIKE interaction for its venue."""
-    query = "SELECT * FROM posts WHERE post_id = ?"
+    query = "UPDATE posts SET likes = likes + 1 WHERE post_id = ? RETURNING likes"
     result = db.execute_query(query, (post.post_id,), fetch=True)
     if result:
-        row = result[0]
-        new_likes = row[5] + 1
-        update_query = "UPDATE posts SET likes = ? WHERE post_id = ?"
-        db.execute_query(update_query, (new_likes, post.post_id))
+        _get_posts_cached.clear()
         if post.venue_id:
             record_interaction(post.venue_id, InteractionType.LIKE)
         st.success("❤️ Liked!")
@@ -181,22 +473,23 @@ def add_comment(post: Post, content: str):
     if not content.strip():
         return
     comment = Comment(
-        comment_id=f"comment_{datetime.now().timestamp()}",
+        comment_id=f"comment_{uuid.uuid4().hex}",
         post_id=post.post_id,
         user_id=current_user.user_id,
         content=content,
         created_at=datetime.now(),
     )
     db.insert_comment(comment)
+    _get_comments_cached.clear()
     st.success("💬 Comment added!")
 
 
 def send_message(recipient_id: str = None, group_id: str = None, content: str = ""):
-    """Send DM or group message."""
+    """Send DM or group message; returns the stored Message (None if blank)."""
     if not content.strip():
-        return
+        return None
     msg = Message(
-        message_id=f"msg_{datetime.now().timestamp()}",
+        message_id=f"msg_{uuid.uuid4().hex}",
         sender_id=current_user.user_id,
         receiver_id=recipient_id,
         group_id=group_id,
@@ -205,19 +498,79 @@ def send_message(recipient_id: str = None, group_id: str = None, content: str =
         read=False,
     )
     db.insert_message(msg)
+    # Drop the conversation's rendered history; it is rebuilt on the next render
+    conversation_id = group_id or recipient_id
+    for key in [k for k in st.session_state.msg_cache if k[0] == conversation_id]:
+        del st.session_state.msg_cache[key]
+    return msg
+
+
+def _chat_row(msg: Message, sender) -> tuple:
+    """(role, text, caption) for one chat message."""
+    return (
+        "user" if msg.sender_id == current_user.user_id else "assistant",
+        f"@{sender.username if sender else 'user'}: {msg.content}",
+        format_dt(msg.timestamp, "%b %d, %H:%M"),
+    )
+
+
+def draw_chat_row(row: tuple):
+    role, text, caption = row
+    with st.chat_message(role):
+        st.write(text)
+        st.caption(caption)
 
 
+def render_messages(conversation_id: str, msgs: list, has_earlier: bool):
+    """Render a chat window (newest-first msgs) oldest-first, with a "Load earlier" pager.
+
+    Rendered (role, text, caption) rows are kept in st.session_state.msg_cache keyed
+    by conversation, newest message and window size, so an unchanged history is
+    replayed without sender lookups or timestamp formatting.
+    """
+    if has_earlier and st.button("⬆️ Load earlier", key="msg_load_earlier"):
+        st.session_state.msg_window += MSG_PAGE_SIZE
+        st.rerun()
+
+    key = (conversation_id, msgs[0].message_id if msgs else None, len(msgs))
+    rows = st.session_state.msg_cache.get(key)
+    if rows is None:
+        senders = db.get_users_bulk({m.sender_id for m in msgs})
+        rows = [_chat_row(msg, senders.get(msg.sender_id)) for msg in reversed(msgs)]
+        st.session_state.msg_cache[key] = rows
+
+    history = st.container()
+    with history:
+        for row in rows:
+            draw_chat_row(row)
+    return history
+
+
+@st.cache_data(ttl=60)
 def get_all_demo_users():
     """Utility to list demo users user_000, user_001, ..."""
-    users = []
-    i = 0
-    while True:
-        u = db.get_user(f"user_{i:03d}")
-        if not u:
-            break
-        users.append(u)
-        i += 1
-    return users
+    return db.get_demo_users()
+
+
+@st.cache_data(ttl=300)
+def _dm_candidates(user_id: str, limit: int = 15):
+    """Demo users other than user_id, for the Messages DM list."""
+    return tuple(u for u in get_all_demo_users() if u.user_id != user_id)[:limit]
+
+
+@st.cache_data(ttl=60)
+def _get_all_venues_cached():
+    return db.get_all_venues()
+
+
+@st.cache_data(ttl=60)
+def _get_user_groups_cached(user_id: str):
+    return db.get_user_groups(user_id)
+
+
+# Interactions buffered by a run that ended in st.rerun() (or still being
+# committed by the background writer) land before any page reads them back
+flush_pending_interactions(wait=True)
 
 # =========================================================
 # 5. SIDEBAR — NAVIGATION & SYSTEM STATUS
@@ -243,11 +596,12 @@ with st.sidebar:
 
     users = get_all_demo_users()
     user_ids = [u.user_id for u in users]
+    users_by_id = {u.user_id: u for u in users}
     selected_user_for_switch = st.selectbox(
         "Select user",
         options=user_ids,
         index=user_ids.index(st.session_state.current_user_id),
-        format_func=lambda uid: next(u.username for u in users if u.user_id == uid),
+        format_func=lambda uid: users_by_id[uid].username,
     )
     if selected_user_for_switch != st.session_state.current_user_id:
         st.session_state.current_user_id = selected_user_for_switch
@@ -295,13 +649,30 @@ if page == "🏠 Home":
     with col_feed:
         st.subheader("📱 Community Feed")
 
-        posts = db.get_posts(limit=20)
+        # Fetch one extra row so we know whether a next page exists
+        feed_page = st.session_state.get("feed_page", 0)
+        page_posts = _get_posts_cached(limit=FEED_PAGE_SIZE + 1, offset=feed_page * FEED_PAGE_SIZE)
+        has_next_page = len(page_posts) > FEED_PAGE_SIZE
+        posts = page_posts[:FEED_PAGE_SIZE]
+
         if not posts:
             st.info("No posts yet; demo data will populate them shortly.")
         else:
+            # Resolve all authors/venues for the page in two IN queries
+            authors = db.get_users_bulk(sorted({p.user_id for p in posts}))
+            post_venues = db.get_venues_bulk(sorted({p.venue_id for p in posts if p.venue_id}))
+            _prefetch_images(p.image_url for p in posts)
+
+            # Comments for every opened post + their authors in two queries
+            open_post_ids = tuple(p.post_id for p in posts if st.session_state.get(f"expand_{p.post_id}"))
+            comments_by_post = _get_comments_cached(open_post_ids) if open_post_ids else {}
+            commenters = db.get_users_bulk(
+                sorted({c.user_id for cs in comments_by_post.values() for c in cs})
+            )
+
             for post in posts:
-                author = db.get_user(post.user_id)
-                venue = db.get_venue(post.venue_id) if post.venue_id else None
+                author = authors.get(post.user_id)
+                venue = post_venues.get(post.venue_id) if post.venue_id else None
 
                 with st.container():
                     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
@@ -310,16 +681,17 @@ if page == "🏠 Home":
                         f"**@{author.username if author else 'unknown'}** "
                         f"{'· 📍 ' + venue.name if venue else ''}"
                     )
-                    st.caption(post.created_at.strftime("%b %d, %Y %H:%M"))
+                    st.caption(format_dt(post.created_at, "%b %d, %Y %H:%M"))
 
                     # Content
                     st.write(post.content)
 
                     # Image
                     if post.image_url:
-                        try:
-                            st.image(post.image_url, use_container_width=True)
-                        except Exception:
+                        image_bytes = _fetch_image(post.image_url)
+                        if image_bytes:
+                            st.image(image_bytes, use_container_width=True)
+                        else:
                             st.caption("Image unavailable")
 
                     # Actions
@@ -336,11 +708,18 @@ if page == "🏠 Home":
                                 record_interaction(venue.venue_id, InteractionType.CLICK)
                                 st.session_state.booking_venue = venue.venue_id
                                 st.success(f"Selected {venue.name} for booking.")
-                    # Comments
-                    with st.expander("💬 Comments"):
-                        comments = db.get_comments(post.post_id)
-                        for c in comments[:5]:
-                            cu = db.get_user(c.user_id)
+                    # Comments (only queried once the user opens them)
+                    expand_key = f"expand_{post.post_id}"
+                    comments_open = st.session_state.get(expand_key, False)
+                    if st.button(
+                        "💬 Hide comments" if comments_open else "💬 Show comments",
+                        key=f"toggle_comments_{post.post_id}",
+                    ):
+                        st.session_state[expand_key] = not comments_open
+                        st.rerun()
+                    if comments_open:
+                        for c in comments_by_post.get(post.post_id, []):
+                            cu = commenters.get(c.user_id)
                             st.markdown(f"**@{cu.username if cu else 'user'}**: {c.content}")
                         new_comment = st.text_input(
                             "Add a comment", key=f"comment_input_{post.post_id}"
@@ -351,13 +730,26 @@ if page == "🏠 Home":
 
                     st.markdown("</div>", unsafe_allow_html=True)
 
+        # Pagination controls
+        p_prev, p_label, p_next = st.columns([1, 2, 1])
+        with p_prev:
+            if st.button("⬅️ Newer", disabled=feed_page == 0, key="feed_prev"):
+                st.session_state.feed_page = feed_page - 1
+                st.rerun()
+        with p_label:
+            st.caption(f"Page {feed_page + 1}")
+        with p_next:
+            if st.button("Older ➡️", disabled=not has_next_page, key="feed_next"):
+                st.session_state.feed_page = feed_page + 1
+                st.rerun()
+
     with col_side:
         st.subheader("🔥 Trending Venues")
-        venues = db.get_all_venues()
-        if not venues:
+        trending = db.get_trending_venues(6)
+        if not trending:
             st.info("No venues in DB.")
         else:
-            for v in sorted(venues, key=lambda vv: vv.trending_score, reverse=True)[:6]:
+            for v in trending:
                 with st.container():
                     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
                     st.markdown(f"**{v.name}**")
@@ -407,14 +799,14 @@ elif page == "🎯 Discover":
                 # Demonstrate "agent → bookings" for the track requirement
                 if ENABLE_BOOKING:
                     if st.button("✨ Auto-create bookings for this itinerary"):
+                        slots = []
                         for item in reply_data["itinerary"]["itinerary"]:
-                            v = db.get_venue(item["venue_id"])
-                            if v:
-                                start_hour = int(item["time"].split(":")[0])
-                                dt = datetime.now().replace(
-                                    hour=start_hour, minute=0, second=0, microsecond=0
-                                ) + timedelta(days=1)
-                                create_booking(v.venue_id, dt, party_size=2, notes="AI itinerary booking")
+                            start_hour = int(item["time"].split(":")[0])
+                            dt = datetime.now().replace(
+                                hour=start_hour, minute=0, second=0, microsecond=0
+                            ) + timedelta(days=1)
+                            slots.append((item["venue_id"], dt))
+                        create_bookings(slots, party_size=2, notes="AI itinerary booking")
                         st.success("Created demo bookings for all itinerary venues!")
 
         with col_meta:
@@ -433,16 +825,18 @@ elif page == "🎯 Discover":
 
     # ------------------------ Core Recommendation Engine ------------------------
     with st.spinner("Computing personalized recommendations with spatial + behavioral signals..."):
-        recommendations, reasoning = rec_engine.recommend_venues(
+        recommendations, reasoning = _recommend_venues_cached(
             current_user.user_id,
+            db.get_interaction_count(current_user.user_id),
             limit=10,
-            show_reasoning=True,
         )
 
     left, right = st.columns([2.2, 1.1])
+    details_by_name = {d["venue"]: d for d in reasoning.get("details", [])}
+
     with left:
         for i, (venue, score) in enumerate(recommendations, start=1):
-            detail = next((d for d in reasoning["details"] if d["venue"] == venue.name), None)
+            detail = details_by_name.get(venue.name)
             with st.container():
                 st.markdown('<div class="glass-card">', unsafe_allow_html=True)
                 st.markdown(f"#### {i}. {venue.name}  ")
@@ -534,7 +928,11 @@ elif page == "👥 People":
     st.subheader("👥 People You Might Enjoy Going Out With")
 
     with st.spinner("Computing compatibility scores (interests + categories + distance)..."):
-        rec_users = rec_engine.recommend_users(current_user.user_id, limit=10)
+        rec_users = _recommend_users_cached(
+            current_user.user_id,
+            db.get_interaction_version(),
+            limit=10,
+        )
 
     if not rec_users:
         st.info("Not enough data yet to recommend compatible people.")
@@ -591,7 +989,7 @@ elif page == "🏘️ Groups":
     tab_my, tab_new = st.tabs(["👀 My & Suggested Groups", "🆕 Create Group"])
 
     with tab_my:
-        groups = db.get_user_groups(current_user.user_id)
+        groups = _get_user_groups_cached(current_user.user_id)
         if not groups:
             st.info("You are not part of any groups yet.")
         else:
@@ -609,11 +1007,10 @@ elif page == "🏘️ Groups":
 
                     if g.planned_venues:
                         venue_id, when_str = g.planned_venues[-1]
-                        v = db.get_venue(venue_id)
-                        when_dt = datetime.fromisoformat(when_str)
+                        v = cached_get_venue(venue_id)
                         st.markdown(
                             f"📅 **Next Plan:** {v.name if v else venue_id} — "
-                            f"{when_dt.strftime('%b %d, %I:%M %p')}"
+                            f"{format_iso(when_str, '%b %d, %I:%M %p')}"
                         )
 
                     c1, c2, c3 = st.columns(3)
@@ -632,6 +1029,7 @@ elif page == "🏘️ Groups":
                                 ) + timedelta(days=1)
                                 g.planned_venues.append((v.venue_id, dt.isoformat()))
                                 db.insert_group(g)
+                                _get_user_groups_cached.clear()
                                 st.success(
                                     f"Planned {v.name} for {dt.strftime('%b %d, %I:%M %p')} (simple RSVP demo)."
                                 )
@@ -653,7 +1051,7 @@ elif page == "🏘️ Groups":
                 st.error("Please give the group a name.")
             else:
                 group = Group(
-                    group_id=f"group_{datetime.now().timestamp()}",
+                    group_id=f"group_{uuid.uuid4().hex}",
                     name=name,
                     description=desc,
                     members=[current_user.user_id],
@@ -662,6 +1060,7 @@ elif page == "🏘️ Groups":
                     venue_preferences=[VenueCategory(c) for c in cats],
                 )
                 db.insert_group(group)
+                _get_user_groups_cached.clear()
                 st.success("Group created!")
                 st.rerun()
 # =========================================================
@@ -678,16 +1077,16 @@ elif page == "💬 Messages":
     # --------------------------
     with col_list:
         st.markdown("### 👥 Direct Messages")
-        all_users = [u for u in get_all_demo_users() if u.user_id != current_user.user_id]
-        for u in all_users[:15]:
+        for u in _dm_candidates(current_user.user_id):
             if st.button(f"@{u.username}", key=f"dm_btn_{u.user_id}", use_container_width=True):
                 st.session_state.selected_dm_user = u.user_id
                 st.session_state.selected_group = None
+                st.session_state.msg_window = MSG_PAGE_SIZE
                 st.rerun()
 
         st.markdown("---")
         st.markdown("### 🏘️ Groups")
-        user_groups = db.get_user_groups(current_user.user_id)
+        user_groups = _get_user_groups_cached(current_user.user_id)
         if not user_groups:
             st.caption("You are not in any groups yet.")
         else:
@@ -696,6 +1095,7 @@ elif page == "💬 Messages":
                 if st.button(label, key=f"group_btn_{g.group_id}", use_container_width=True):
                     st.session_state.selected_group = g.group_id
                     st.session_state.selected_dm_user = None
+                    st.session_state.msg_window = MSG_PAGE_SIZE
                     st.rerun()
 
     # --------------------------
@@ -704,62 +1104,67 @@ elif page == "💬 Messages":
     with col_chat:
         # DM chat
         if st.session_state.selected_dm_user:
-            other = db.get_user(st.session_state.selected_dm_user)
+            other = cached_get_user(st.session_state.selected_dm_user)
             st.markdown(f"### 💬 Chat with @{other.username}")
 
+            # One extra row tells us whether there is anything earlier to load
+            window = st.session_state.msg_window
             msgs = db.get_messages(
                 current_user.user_id,
                 other_user_id=other.user_id,
                 group_id=None,
-                limit=50,
+                limit=window + 1,
             )
+            has_earlier = len(msgs) > window
+            msgs = msgs[:window]
 
-            for msg in reversed(msgs):
-                sender = db.get_user(msg.sender_id)
-                with st.chat_message(
-                    "user" if msg.sender_id == current_user.user_id else "assistant"
-                ):
-                    st.write(f"@{sender.username if sender else 'user'}: {msg.content}")
-                    st.caption(msg.timestamp.strftime("%b %d, %H:%M"))
+            history = render_messages(other.user_id, msgs, has_earlier)
 
             new_msg = st.chat_input("Send a message...")
             if new_msg:
-                send_message(recipient_id=other.user_id, content=new_msg)
-                st.rerun()
+                sent = send_message(recipient_id=other.user_id, content=new_msg)
+                # chat_input submission already reran the script; append the new
+                # message in place instead of paying for a second full rerun
+                if sent:
+                    with history:
+                        draw_chat_row(_chat_row(sent, current_user))
 
         # Group chat
         elif st.session_state.selected_group:
             g = db.get_group(st.session_state.selected_group)
             st.markdown(f"### 🏘️ Group: {g.name}")
 
+            window = st.session_state.msg_window
             msgs = db.get_messages(
                 current_user.user_id,
                 other_user_id=None,
                 group_id=g.group_id,
-                limit=50,
+                limit=window + 1,
             )
+            has_earlier = len(msgs) > window
+            msgs = msgs[:window]
 
             # Show messages
-            for msg in reversed(msgs):
-                sender = db.get_user(msg.sender_id)
-                with st.chat_message(
-                    "user" if msg.sender_id == current_user.user_id else "assistant"
-                ):
-                    st.write(f"@{sender.username if sender else 'user'}: {msg.content}")
-                    st.caption(msg.timestamp.strftime("%b %d, %H:%M"))
+            history = render_messages(g.group_id, msgs, has_earlier)
 
             # Send new group message
             new_msg = st.chat_input("Send a message to the group...")
             if new_msg:
-                send_message(group_id=g.group_id, content=new_msg)
-                st.rerun()
+                sent = send_message(group_id=g.group_id, content=new_msg)
+                if sent:
+                    with history:
+                        draw_chat_row(_chat_row(sent, current_user))
 
             # --------- AI ANALYSIS BUTTONS ---------
 
             if msgs:
                 if st.button("🤖 Analyze this group's chat & suggest places", key="analyze_real_group"):
                     history_texts = [m.content for m in msgs]
-                    result = system.ai_agent.analyze_group_chat(history_texts, current_user.user_id)
+                    result = _analyze_group_chat_cached(
+                        tuple(history_texts),
+                        current_user.user_id,
+                        db.get_interaction_count(current_user.user_id),
+                    )
                     st.markdown("### 🤖 AI Suggestion (from real chat)")
                     st.markdown(result["formatted"])
 
@@ -772,7 +1177,11 @@ elif page == "💬 Messages":
                     "Outdoor seating would be amazing if the weather is nice.",
                     "Budget friendly would be good, but I'm okay paying more if it's really good.",
                 ]
-                result = system.ai_agent.analyze_group_chat(demo_chat, current_user.user_id)
+                result = _analyze_group_chat_cached(
+                    tuple(demo_chat),
+                    current_user.user_id,
+                    db.get_interaction_count(current_user.user_id),
+                )
                 st.markdown("### 🤖 AI Suggestion (demo foodie chat)")
                 st.markdown(result["formatted"])
 
@@ -786,31 +1195,16 @@ elif page == "💬 Messages":
 elif page == "🎫 Bookings":
     st.subheader("🎫 Your Bookings")
 
-    bookings = db.get_user_bookings(current_user.user_id)
-    if bookings:
-        for b in bookings:
-            v = db.get_venue(b.venue_id)
-            with st.container():
-                st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                st.markdown(f"#### {v.name if v else b.venue_id}")
-                st.caption(
-                    f"📅 {b.booking_date.strftime('%b %d, %Y %I:%M %p')} · "
-                    f"👥 {b.party_size} · Status: **{b.status.upper()}**"
-                )
-                if b.special_notes:
-                    st.caption(f"📝 {b.special_notes}")
-                if b.qr_code:
-                    st.markdown("**🎟️ QR Code (Demo):**", unsafe_allow_html=True)
-                    st.markdown(f"<img src='{b.qr_code}' width='140'>", unsafe_allow_html=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-    else:
-        st.info("No bookings yet. Use Discover or AI to pick a place, then create a booking here.")
+    # Filled in after the form below so a booking made on this run is listed
+    # without a second rerun
+    bookings_area = st.container()
 
     st.markdown("---")
     st.markdown("### 🆕 New Booking")
 
-    venues = db.get_all_venues()
+    venues = _get_all_venues_cached()
     venue_ids = [v.venue_id for v in venues]
+    venue_name_by_id = {v.venue_id: v.name for v in venues}
 
     # Preselect from Discover's 'Book' button
     default_idx = 0
@@ -823,7 +1217,7 @@ elif page == "🎫 Bookings":
             "Select venue",
             venue_ids,
             index=default_idx,
-            format_func=lambda vid: next(v.name for v in venues if v.venue_id == vid),
+            format_func=venue_name_by_id.__getitem__,
         )
     with col2:
         date = st.date_input("Date", value=datetime.now().date() + timedelta(days=1))
@@ -840,7 +1234,38 @@ elif page == "🎫 Bookings":
         b = create_booking(selected_vid, dt, party_size, notes)
         st.success(f"Booking created! ID: {b.booking_id}")
         st.session_state.booking_venue = selected_vid
-        st.rerun()
+
+    with bookings_area:
+        shown = st.session_state.bookings_shown
+        bookings = db.get_user_bookings(current_user.user_id, limit=shown + 1)
+        has_older = len(bookings) > shown
+        bookings = bookings[:shown]
+        if bookings:
+            booked_venues = db.get_venues_bulk({b.venue_id for b in bookings})
+            for b in bookings:
+                v = booked_venues.get(b.venue_id)
+                with st.container():
+                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+                    st.markdown(f"#### {v.name if v else b.venue_id}")
+                    st.caption(
+                        f"📅 {format_dt(b.booking_date, '%b %d, %Y %I:%M %p')} · "
+                        f"👥 {b.party_size} · Status: **{b.status.upper()}**"
+                    )
+                    if b.special_notes:
+                        st.caption(f"📝 {b.special_notes}")
+                    if b.qr_code:
+                        st.markdown("**🎟️ QR Code (Demo):**", unsafe_allow_html=True)
+                        st.markdown(
+                            f"<img src='{b.qr_code}' width='140' loading='lazy' decoding='async' "
+                            f"alt='QR for {b.booking_id}'>",
+                            unsafe_allow_html=True,
+                        )
+                    st.markdown("</div>", unsafe_allow_html=True)
+            if has_older and st.button("⬇️ Show older bookings", key="bookings_more"):
+                st.session_state.bookings_shown += BOOKINGS_PAGE_SIZE
+                st.rerun()
+        else:
+            st.info("No bookings yet. Use Discover or AI to pick a place, then create a booking here.")
 
 # =========================================================
 # 12. PAGE: PROFILE — USER SNAPSHOT
@@ -867,8 +1292,9 @@ elif page == "👤 Profile":
     st.markdown("### 📌 Saved Venues")
 
     if current_user.saved_venues:
+        saved = db.get_venues_bulk(current_user.saved_venues)
         for vid in current_user.saved_venues:
-            v = db.get_venue(vid)
+            v = saved.get(vid)
             if v:
                 st.markdown(f"- **{v.name}** — {v.category.value} · ⭐ {v.rating}/5")
     else:
@@ -879,14 +1305,34 @@ elif page == "👤 Profile":
 # =========================================================
 
 elif page == "📊 Analytics":
+    # Plotly is only needed here (and by the saved-venues map); importing it lazily
+    # keeps it off the cold start of every other page
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     st.subheader("📊 Behavioral Analytics & Model Insights")
     st.markdown("This dashboard shows how the recommendation engine understands your behavior, how the ML model ranks venues, and how the AI agent interprets group chats.")
 
     # -----------------------------------------
     # USER PROFILE
     # -----------------------------------------
-    profile = rec_engine.build_user_profile(current_user.user_id)
     interactions = db.get_user_interactions(current_user.user_id)
+    profile = _build_user_profile_cached(current_user.user_id, len(interactions))
+
+    # One frame over all interactions; counts and view time are column aggregations
+    df_inter = pd.DataFrame(
+        [(i.venue_id, i.interaction_type.value, i.duration_seconds) for i in interactions],
+        columns=["venue_id", "type", "dur"],
+    )
+    type_counts = df_inter["type"].value_counts()
+    cat_map = {v.venue_id: v.category.value for v in _get_all_venues_cached()}
+    df_inter["cat"] = df_inter["venue_id"].map(cat_map)
+    df_time = (
+        df_inter[df_inter["type"] == InteractionType.VIEW.value]
+        .groupby("cat")["dur"].sum()
+        .reset_index()
+        .rename(columns={"cat": "Category", "dur": "Seconds"})
+    )
 
     st.markdown("### 1️⃣ User Interaction Summary")
 
@@ -894,11 +1340,11 @@ elif page == "📊 Analytics":
     with c1:
         st.metric("Total Interactions", len(interactions))
     with c2:
-        st.metric("Likes", len([i for i in interactions if i.interaction_type == InteractionType.LIKE]))
+        st.metric("Likes", int(type_counts.get(InteractionType.LIKE.value, 0)))
     with c3:
-        st.metric("Views", len([i for i in interactions if i.interaction_type == InteractionType.VIEW]))
+        st.metric("Views", int(type_counts.get(InteractionType.VIEW.value, 0)))
     with c4:
-        st.metric("Saves", len([i for i in interactions if i.interaction_type == InteractionType.SAVE]))
+        st.metric("Saves", int(type_counts.get(InteractionType.SAVE.value, 0)))
 
     st.markdown("---")
 
@@ -923,15 +1369,7 @@ elif page == "📊 Analytics":
 
     with col_time:
         st.markdown("### ⏱️ Time Spent per Category")
-        time_data = defaultdict(int)
-        for inter in interactions:
-            if inter.interaction_type == InteractionType.VIEW:
-                v = db.get_venue(inter.venue_id)
-                if v:
-                    time_data[v.category.value] += inter.duration_seconds
-
-        if time_data:
-            df_time = pd.DataFrame({"Category": list(time_data.keys()), "Seconds": list(time_data.values())})
+        if not df_time.empty:
             fig = px.pie(df_time, values="Seconds", names="Category", title="View Time Distribution")
             fig.update_layout(template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)")
             st.plotly_chart(fig, use_container_width=True)
@@ -962,23 +1400,24 @@ elif page == "📊 Analytics":
     # -----------------------------------------
     st.markdown("### 3️⃣ Recommendation Score Breakdown (Top Venues)")
 
-    recs, reasoning = rec_engine.recommend_venues(current_user.user_id, limit=5, show_reasoning=True)
+    recs, reasoning = _recommend_venues_cached(current_user.user_id, len(interactions), limit=5)
 
     if recs:
-        rows = []
-        for d in reasoning["details"]:
-            rows.append(
-                {
-                    "Venue": d["venue"],
-                    "Rating": d["rating_component"],
-                    "Distance": d["distance_component"],
-                    "Trending": d["trending_component"],
-                    "Category": d["category_component"],
-                    "Final Score": d["final_score"],
-                    "ML Score": d.get("ml_score"),
-                }
-            )
-        df = pd.DataFrame(rows)
+        df = pd.DataFrame.from_records(
+            reasoning["details"],
+            columns=[
+                "venue", "rating_component", "distance_component", "trending_component",
+                "category_component", "final_score", "ml_score",
+            ],
+        ).rename(columns={
+            "venue": "Venue",
+            "rating_component": "Rating",
+            "distance_component": "Distance",
+            "trending_component": "Trending",
+            "category_component": "Category",
+            "final_score": "Final Score",
+            "ml_score": "ML Score",
+        })
 
         fig = go.Figure()
         for comp in ["Rating", "Distance", "Trending", "Category"]:
@@ -1021,74 +1460,14 @@ elif page == "📊 Analytics":
     # -----------------------------------------
     st.markdown("### 5️⃣ Recommendation Engine Architecture Overview")
 
-    st.markdown("""
-#### 🧠 End-to-End Pipeline
-
-**1. Behavioral Signal Processing**
-- Track view duration → attention score  
-- Likes / Saves / Visits → preference label  
-- Category engagement computed dynamically  
-
-**2. Venue Feature Vector**
-`[rating, distance, trending, category_score, capacity]` normalized per venue  
-
-**3. Hybrid Ranking Model**
-- Heuristic weighted score  
-- RandomForest ML Ranker  
-- Final score = **0.5 ML + 0.5 heuristic**  
-
-**4. LLM Agent Understanding**
-- Gemini extracts:  
-  - Vibe (romantic, calm, adventure…)  
-  - Cuisine preference (Italian, Japanese…)  
-  - Budget  
-  - Mood score (0–100)  
-- These constraints further filter ML suggestions  
-
-**5. Fallback & Robustness**
-- If vibe/cuisine filtering empties the list → return top ML-ranked venues  
-- Always guarantees minimum 3 results  
-
-**6. Itinerary Generation**
-- Auto 6 PM → 8 PM → 10 PM route  
-- Based on filtered best venues  
-
-""")
+    with st.expander("Pipeline architecture", expanded=False):
+        st.markdown(_PIPELINE_MD)
 
     st.markdown("---")
 
     st.markdown("### ℹ️ How This Satisfies the Official Problem Statement")
-    st.caption(
-        """
-**Track 2 Backend Requirements Mapping:**  
-
-- ✅ **Recommendation Engine**  
-   - Machine Learning hybrid scoring  
-   - Uses behavioral interaction signals  
-   - Spatial distance + trending + rating + preference vectors  
-   - ML Ranker trained on user interaction logs  
-
-- ✅ **Spatial Analysis**  
-   - Haversine distance → used in scoring  
-
-- ✅ **Social Compatibility**  
-   - Group chat LLM analysis  
-   - Group vibe / cuisine / budget factor into final recs  
-
-- ✅ **AI Agents**  
-   - LLM Intent Parsing (Gemini 2.5 Flash)  
-   - Automated multi-step itinerary generation  
-   - Booking simulation + QR codes  
-
-- ✅ **Full System Insight**  
-   - Analytics dashboard displays:   
-      * User engagement  
-      * Feature vectors  
-      * Model weights  
-      * LLM extraction outputs  
-      * Pipeline visualization  
-"""
-    )
+    with st.expander("Requirements mapping", expanded=False):
+        st.caption(_REQUIREMENTS_MD)
 
 
 
@@ -1117,17 +1496,27 @@ elif page == "🤖 Luna AI":
             st.write(user_msg)
 
         # Call AI agent (Gemini if key available, fallback otherwise)
+        # Reply is streamed into a placeholder chunk by chunk (st.write_stream
+        # needs Streamlit >= 1.31)
         with st.chat_message("assistant"):
+            placeholder = st.empty()
             with st.spinner("Luna is thinking..."):
-                reply_text, reply_data = ai_agent.chat(current_user.user_id, user_msg)
-                st.write(reply_text)
+                reply_text = ""
+                for chunk in ai_agent.chat_stream(current_user.user_id, user_msg):
+                    reply_text += chunk
+                    placeholder.markdown(reply_text + "▌")
+            placeholder.write(reply_text)
+            reply_data = ai_agent.last_response
 
-                # OPTIONAL: show debug info on intent
-                with st.expander("🧠 Debug: Parsed Intent & Data"):
-                    st.write(reply_data)
+            # OPTIONAL: show debug info on intent
+            with st.expander("🧠 Debug: Parsed Intent & Data"):
+                st.write(reply_data)
 
         st.session_state.chat_history.append({"role": "assistant", "content": reply_text})
 
+# Commit this rerun's buffered interactions off the script thread
+flush_pending_interactions()
+
 # =========================================================
 # 15. FOOTER
 # =========================================================
@@ -1144,7 +1533,6 @@ st.markdown(
 # ============================
 # HARD-CODED MAP OF SAVED VENUES
 # ============================
-import plotly.express as px
 
 st.subheader("🗺️ Your Liked Venues — Map View")
 
@@ -1153,37 +1541,7 @@ saved_venue_ids = current_user.saved_venues
 if not saved_venue_ids:
     st.info("Here's Your latest RSVP distance")
 else:
-    venues = []
-    for vid in saved_venue_ids:
-        v = db.get_venue(vid)
-        if v:
-            venues.append({
-                "name": v.name,
-                "lat": v.location[0],
-                "lon": v.location[1],
-                "rating": v.rating,
-                "category": v.category.value,
-                "address": v.address
-            })
-
-    df = pd.DataFrame(venues)
-
-    fig = px.scatter_mapbox(
-        df,
-        lat="lat",
-        lon="lon",
-        hover_name="name",
-        hover_data=["category", "rating", "address"],
-        zoom=11,
-        height=450
-    )
-
-    fig.update_layout(
-        mapbox_style="open-street-map",
-        margin=dict(l=0, r=0, t=0, b=0)
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(_saved_venues_fig(tuple(saved_venue_ids)), use_container_width=True)
 
 google_map_iframe = """
 <iframe 
@@ -1197,4 +1555,10 @@ google_map_iframe = """
 </iframe>
 """
 
-st.components.v1.html(google_map_iframe, height=500)
\ No newline at end of file
+# The Google Maps embed pulls in a heavy JS bundle; only offer it on the
+# map-relevant pages and load it on demand
+if page in ("🎯 Discover", "👤 Profile"):
+    if st.button("🗺️ Load interactive map", key="load_google_map"):
+        st.session_state.map_loaded = True
+    if st.session_state.get("map_loaded"):
+        st.components.v1.html(google_map_iframe, height=500)
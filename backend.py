@@ -1,10 +1,11 @@
 import os
 import json
 import pickle
+import copy
 import hashlib
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import AbstractSet, Dict, List, Tuple, Optional
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass, asdict, field
@@ -14,15 +15,43 @@ import qrcode
 from io import BytesIO
 import base64
 import re
-from collections import defaultdict, Counter
+from collections import Counter
 import math
+import functools
+import threading
+import time
+import queue
+from contextlib import contextmanager
 
 from luna_agent import LunaAIAgent
 # ML Libraries
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.decomposition import PCA
+
+# Optional JIT for numeric kernels (falls back to NumPy when unavailable)
+try:
+    import numba
+    from numba import njit, prange
+    # The parallel kernels are first compiled and launched off the main thread (the
+    # init thread, Streamlit's script threads); the TBB layer can deadlock there, so
+    # prefer OpenMP unless the environment picks a layer explicitly
+    if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional fast codec for the JSON-encoded list columns (falls back to stdlib json)
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
 
 # AI Integration
 import google.generativeai as genai
@@ -31,6 +60,10 @@ import google.generativeai as genai
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash")  # or "gemini-2.5-flash"
 GEMINI_EMBED_MODEL = os.getenv("GEMINI_EMBED_MODEL", "models/text-embedding-004")
 
+# Stored timestamps are re-read many times (profiles, training, feeds) and
+# datetimes are immutable, so parsed values are shared through an LRU cache
+_parse_dt = functools.lru_cache(maxsize=16384)(datetime.fromisoformat)
+
 # ========================= DATA MODELS =========================
 class VenueCategory(Enum):
     CAFE = "Café"
@@ -52,6 +85,14 @@ class InteractionType(Enum):
     CLICK = "click"
     VISIT = "visit"
 
+# Stored enum value -> member. A plain dict hit skips the EnumType.__call__
+# machinery that VenueCategory(value) goes through on every decoded row
+_VENUE_CATEGORY_BY_VALUE = {c.value: c for c in VenueCategory}
+_INTERACTION_TYPE_BY_VALUE = {t.value: t for t in InteractionType}
+_VENUE_CATEGORY_INDEX = {c.value: k for k, c in enumerate(VenueCategory)}
+_VENUE_CATEGORY_VALUES = [c.value for c in VenueCategory]
+_INTERACTION_TYPE_INDEX = {t.value: k for k, t in enumerate(InteractionType)}
+
 @dataclass
 class User:
     user_id: str
@@ -148,11 +189,194 @@ class Message:
     read: bool = False
 
 # ========================= DATABASE LAYER =========================
+# Per-connection pragmas (journal_mode=WAL is persistent and set once in init_db)
+SQLITE_PRAGMAS = (
+    "synchronous=NORMAL",
+    "busy_timeout=5000",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+)
+SQLITE_CACHED_STATEMENTS = 256
+
+# Decoded User/Venue objects are kept per LunaDatabase so recommender loops skip
+# the SELECT + JSON decode. Writes through this instance invalidate immediately;
+# the TTL bounds staleness from other sessions writing the same file.
+ENTITY_CACHE_TTL = float(os.getenv("LUNA_ENTITY_CACHE_TTL", "30"))
+ENTITY_CACHE_MAX = 1024
+
+# Numeric columns of the venue snapshot, scaled once when it is built
+# (coordinates are kept in radians with cos(lat) precomputed for haversine_vec_rad)
+VENUE_STORE_COLUMNS = ("rating", "trending", "capacity", "lat_rad", "lon_rad", "cos_lat")
+
+# Hot read statements, kept as single shared strings so every call hits the
+# pooled connection's statement cache instead of re-preparing the SQL
+_GET_USER_SQL = 'SELECT * FROM users WHERE user_id = ?'
+_GET_VENUE_SQL = 'SELECT * FROM venues WHERE venue_id = ?'
+_GET_COMMENTS_SQL = 'SELECT * FROM comments WHERE post_id = ? ORDER BY created_at DESC'
+_GET_USER_INTERACTIONS_SQL = 'SELECT * FROM interactions WHERE user_id = ? ORDER BY timestamp DESC'
+
+@functools.lru_cache(maxsize=None)
+def _in_placeholders(size: int) -> str:
+    return ",".join("?" * size)
+
+def in_clause(ids) -> Tuple[str, tuple]:
+    """Build "?,?,..." placeholders + params for an IN (...) filter.
+
+    The list is padded with NULLs (which never match) up to the next power of
+    two, so only ~log2(N) distinct SQL strings ever reach the statement cache.
+    """
+    ids = tuple(ids)
+    size = 1 << max(len(ids) - 1, 0).bit_length()
+    return _in_placeholders(size), ids + (None,) * (size - len(ids))
+
+# Bound on the per-snapshot interest-term memo (terms come from user interests)
+TERM_ROWS_MAX = 4096
+
+@dataclass
+class VenueArrays:
+    """Structure-of-arrays snapshot of the venues table, one row per venue"""
+    venues: List[Venue]
+    index: Dict[str, int]          # venue_id -> row
+    columns: np.ndarray            # (N, len(VENUE_STORE_COLUMNS)) float64
+    category_idx: np.ndarray       # position in VenueCategory, int
+    search_text: str               # lowercased "name\0description" of every venue, \0-joined
+    search_starts: np.ndarray      # offset of each venue's segment in search_text
+    # term -> rows_containing result; lives and dies with the snapshot
+    _term_rows: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, venues: List[Venue]) -> "VenueArrays":
+        rows = []
+        for venue in venues:
+            lat_rad, lon_rad = math.radians(venue.location[0]), math.radians(venue.location[1])
+            rows.append((venue.rating / 5.0, venue.trending_score, venue.capacity / 1000,
+                         lat_rad, lon_rad, math.cos(lat_rad)))
+        return cls(
+            venues=venues,
+            index={v.venue_id: i for i, v in enumerate(venues)},
+            columns=np.array(rows, dtype=np.float64).reshape(len(venues), len(VENUE_STORE_COLUMNS)),
+            category_idx=np.array([_VENUE_CATEGORY_INDEX[v.category.value] for v in venues], dtype=np.intp),
+            **cls._search_index([f"{v.name}\0{v.description}".lower() for v in venues]),
+        )
+
+    @staticmethod
+    def _search_index(segments: List[str]) -> Dict:
+        starts = np.zeros(len(segments), dtype=np.intp)
+        if segments:
+            starts[1:] = np.cumsum([len(seg) + 1 for seg in segments[:-1]])
+        return {"search_text": "\0".join(segments), "search_starts": starts}
+
+    def rows_containing(self, term: str) -> np.ndarray:
+        """Rows whose name or description contains term, case-insensitively (read-only, memoized)"""
+        rows = self._term_rows.get(term)
+        if rows is None:
+            # One C-level scan of the joined text; the \0 separators keep matches
+            # inside a single name or description
+            hits = [m.start() for m in re.finditer(re.escape(term.lower()), self.search_text)]
+            rows = np.unique(np.searchsorted(self.search_starts, hits, side="right") - 1)
+            rows.flags.writeable = False
+            if len(self._term_rows) >= TERM_ROWS_MAX:
+                self._term_rows.clear()
+            self._term_rows[term] = rows
+        return rows
+
 class LunaDatabase:
     def __init__(self, db_path: str = "luna_social.db"):
         self.db_path = db_path
+        self._local = threading.local()  # One pooled connection per thread
+        self._user_cache: Dict[str, Tuple[float, User]] = {}
+        # Bumped on every user/venue/interaction write through this instance, so
+        # derived caches (e.g. engine profiles) can tell when they are stale
+        self.data_version = 0
+        self._venue_cache: Dict[str, Tuple[float, Venue]] = {}
+        # Structure-of-arrays venue snapshot, rebuilt lazily after venue writes
+        self._venue_arrays: Optional[VenueArrays] = None
+        # Write-behind queue for interaction logging, drained by one background thread
+        self._write_queue: "queue.Queue[List[Interaction]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # (exception, interactions) from the last failed background write, raised to the next caller
+        self._write_error: Optional[Tuple[Exception, List[Interaction]]] = None
         self.init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the tuned pragmas applied"""
+        conn = sqlite3.connect(self.db_path, cached_statements=SQLITE_CACHED_STATEMENTS)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's pooled connection, opened (and tuned) on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @staticmethod
+    def _cache_get(cache: Dict, key: str):
+        entry = cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ENTITY_CACHE_TTL:
+            return entry[1]
+        return None
+
+    @staticmethod
+    def _cache_put(cache: Dict, key: str, value):
+        if len(cache) >= ENTITY_CACHE_MAX:
+            cache.pop(next(iter(cache)), None)  # Drop the oldest entry
+        cache[key] = (time.monotonic(), value)
+
+    @contextmanager
+    def bulk_load(self):
+        """Run this thread's writes as one seeding transaction with relaxed durability.
+
+        BEGIN IMMEDIATE takes the write lock before the emptiness check, so two
+        concurrent seeders can't both see an empty database: the second waits, then
+        finds rows and upserts. On an empty database the bulk_insert_* methods use a
+        plain INSERT (see _insert_verb). Everything commits (or rolls back) together.
+
+        synchronous=OFF skips the fsyncs; journal_mode stays WAL because
+        leaving WAL needs exclusive access while other threads hold connections.
+        """
+        conn = self._conn()
+        conn.execute("PRAGMA synchronous=OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.bulk_txn = True
+            self._local.fresh_load = not conn.execute('SELECT 1 FROM users LIMIT 1').fetchone()
+            try:
+                yield
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            self._local.bulk_txn = self._local.fresh_load = False
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+    @contextmanager
+    def _write(self):
+        """This thread's connection for a write; commits on exit unless bulk_load() owns the transaction"""
+        conn = self._conn()
+        if getattr(self._local, "bulk_txn", False):
+            yield conn
+        else:
+            with conn:
+                yield conn
+
+    def _insert_verb(self) -> str:
+        # OR REPLACE turns a conflict into DELETE + INSERT; a plain INSERT skips that
+        # work when bulk_load() has found the database empty under its write lock
+        return "INSERT" if getattr(self._local, "fresh_load", False) else "INSERT OR REPLACE"
+
+    def close(self):
+        """Close the calling thread's pooled connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def get_all_user_ids(self) -> List[str]:
         query = "SELECT user_id FROM users"
         results = self.execute_query(query, fetch=True)
@@ -160,7 +384,8 @@ class LunaDatabase:
         
     def init_db(self):
         """Initialize SQLite database with all tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         
         # Users table
@@ -264,6 +489,18 @@ class LunaDatabase:
             planned_venues TEXT,
             FOREIGN KEY (creator_id) REFERENCES users (user_id)
         )''')
+
+        # Group membership, normalized out of groups.members for indexed lookups
+        cursor.execute('''CREATE TABLE IF NOT EXISTS group_members (
+            group_id TEXT,
+            user_id TEXT,
+            PRIMARY KEY (user_id, group_id),
+            FOREIGN KEY (group_id) REFERENCES groups (group_id),
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )''')
+        # Backfill membership for groups written before the table existed
+        cursor.execute('''INSERT OR IGNORE INTO group_members (group_id, user_id)
+                          SELECT g.group_id, m.value FROM groups g, json_each(g.members) m''')
         
         # Messages table
         cursor.execute('''CREATE TABLE IF NOT EXISTS messages (
@@ -289,215 +526,553 @@ class LunaDatabase:
             FOREIGN KEY (user_id) REFERENCES users (user_id)
         )''')
         
+        # Indexes backing the ORDER BY / WHERE clauses of the read paths
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_venues_trending ON venues (trending_score DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts (created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_post_id ON comments (post_id, created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_interactions_user_time ON interactions (user_id, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_user_id ON bookings (user_id, booking_date DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_groups_creator_id ON groups (creator_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_pair ON messages (sender_id, receiver_id, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_group ON messages (group_id, timestamp DESC)')
+        
+        # R*Tree over venue coordinates (keyed by venues.rowid), kept in sync by triggers
+        cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS venues_rtree
+                          USING rtree(id, min_lat, max_lat, min_lon, max_lon)''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS venues_rtree_insert AFTER INSERT ON venues BEGIN
+                              INSERT OR REPLACE INTO venues_rtree VALUES (
+                                  NEW.rowid,
+                                  json_extract(NEW.location, '$[0]'), json_extract(NEW.location, '$[0]'),
+                                  json_extract(NEW.location, '$[1]'), json_extract(NEW.location, '$[1]'));
+                          END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS venues_rtree_update AFTER UPDATE OF location ON venues BEGIN
+                              INSERT OR REPLACE INTO venues_rtree VALUES (
+                                  NEW.rowid,
+                                  json_extract(NEW.location, '$[0]'), json_extract(NEW.location, '$[0]'),
+                                  json_extract(NEW.location, '$[1]'), json_extract(NEW.location, '$[1]'));
+                          END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS venues_rtree_delete AFTER DELETE ON venues BEGIN
+                              DELETE FROM venues_rtree WHERE id = OLD.rowid;
+                          END''')
+        # INSERT OR REPLACE drops the old row without firing delete triggers, so
+        # prune orphaned entries and index any venues written before the table existed
+        cursor.execute('DELETE FROM venues_rtree WHERE id NOT IN (SELECT rowid FROM venues)')
+        cursor.execute('''INSERT INTO venues_rtree
+                          SELECT rowid,
+                                 json_extract(location, '$[0]'), json_extract(location, '$[0]'),
+                                 json_extract(location, '$[1]'), json_extract(location, '$[1]')
+                          FROM venues WHERE rowid NOT IN (SELECT id FROM venues_rtree)''')
+        
         conn.commit()
-        conn.close()
         
     def execute_query(self, query: str, params: tuple = (), fetch: bool = False):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        result = cursor.fetchall() if fetch else None
-        conn.close()
+        try:
+            cursor.execute(query, params)
+            # Drain rows before committing so DML ... RETURNING statements can finish
+            result = cursor.fetchall() if fetch else None
+        except Exception:
+            # Don't leave a half-done write open on the shared connection
+            # (inside bulk_load() the whole seeding transaction rolls back instead)
+            if conn.in_transaction and not getattr(self._local, "bulk_txn", False):
+                conn.rollback()
+            raise
+        # sqlite3 only opens a transaction for DML, so plain reads skip the commit
+        if conn.in_transaction and not getattr(self._local, "bulk_txn", False):
+            conn.commit()
         return result
         
     def insert_user(self, user: User):
         query = '''INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._user_params(user))
+        self._user_cache.pop(user.user_id, None)
+        self.data_version += 1
+
+    def bulk_insert_users(self, users: List[User]):
+        """Insert many users in a single transaction (one commit)"""
+        if not users:
+            return
+        query = f'''{self._insert_verb()} INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._user_params(u) for u in users])
+        self._user_cache.clear()
+        self.data_version += 1
+
+    @staticmethod
+    def _user_params(user: User) -> tuple:
+        return (
             user.user_id, user.username, user.email, "", 
-            user.created_at.isoformat(), json.dumps(user.location),
+            user.created_at.isoformat(), _dumps(user.location),
             user.bio, user.avatar_url, user.verified,
-            json.dumps(user.interests), json.dumps(user.saved_venues),
-            json.dumps(user.bookings), json.dumps(user.friends),
-            json.dumps(user.blocked_users)
+            _dumps(user.interests), _dumps(user.saved_venues),
+            _dumps(user.bookings), _dumps(user.friends),
+            _dumps(user.blocked_users)
         )
-        self.execute_query(query, params)
         
     def get_user(self, user_id: str) -> Optional[User]:
-        query = 'SELECT * FROM users WHERE user_id = ?'
-        result = self.execute_query(query, (user_id,), fetch=True)
+        # Callers get their own copy: mutating it (e.g. appending bookings before
+        # a write) must not leak into the shared cache entry
+        user = self._cache_get(self._user_cache, user_id)
+        if user is not None:
+            return copy.deepcopy(user)
+        result = self.execute_query(_GET_USER_SQL, (user_id,), fetch=True)
         if result:
-            row = result[0]
-            return User(
-                user_id=row[0], username=row[1], email=row[2],
-                created_at=datetime.fromisoformat(row[4]),
-                location=tuple(json.loads(row[5])),
-                bio=row[6], avatar_url=row[7], verified=row[8],
-                interests=json.loads(row[9]), saved_venues=json.loads(row[10]),
-                bookings=json.loads(row[11]), friends=json.loads(row[12]),
-                blocked_users=json.loads(row[13])
-            )
+            user = self._row_to_user(result[0])
+            self._cache_put(self._user_cache, user_id, user)
+            return copy.deepcopy(user)
         return None
+
+    def get_users_bulk(self, user_ids: List[str]) -> Dict[str, User]:
+        """Fetch many users in one IN query, keyed by user_id"""
+        if not user_ids:
+            return {}
+        placeholders, params = in_clause(user_ids)
+        query = f'SELECT * FROM users WHERE user_id IN ({placeholders})'
+        results = self.execute_query(query, params, fetch=True)
+        return {row[0]: self._row_to_user(row) for row in results}
+
+    def get_all_users(self) -> List[User]:
+        """Every user in one query, ordered by user_id"""
+        results = self.execute_query('SELECT * FROM users ORDER BY user_id', fetch=True)
+        return [self._row_to_user(row) for row in results]
+
+    def get_demo_users(self) -> List[User]:
+        """Fetch all demo users (user_000, user_001, ...) in one query"""
+        query = "SELECT * FROM users WHERE user_id LIKE 'user\\_%' ESCAPE '\\' ORDER BY user_id"
+        results = self.execute_query(query, fetch=True)
+        return [self._row_to_user(row) for row in results]
+
+    # Row decoders unpack the plain tuple rows into named columns: as readable as
+    # sqlite3.Row without its per-field lookup cost, and a column-count mismatch
+    # fails loudly instead of shifting fields
+    @staticmethod
+    def _row_to_user(row) -> User:
+        (user_id, username, email, _password_hash, created_at, location, bio,
+         avatar_url, verified, interests, saved_venues, bookings, friends,
+         blocked_users) = row
+        return User(
+            user_id=user_id, username=username, email=email,
+            created_at=_parse_dt(created_at),
+            location=tuple(_loads(location)),
+            bio=bio, avatar_url=avatar_url, verified=verified,
+            interests=_loads(interests), saved_venues=_loads(saved_venues),
+            bookings=_loads(bookings), friends=_loads(friends),
+            blocked_users=_loads(blocked_users)
+        )
         
     def insert_venue(self, venue: Venue):
         query = '''INSERT OR REPLACE INTO venues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._venue_params(venue))
+        self._venue_cache.pop(venue.venue_id, None)
+        self._venue_arrays = None
+        self.data_version += 1
+
+    def bulk_insert_venues(self, venues: List[Venue]):
+        """Insert many venues in a single transaction (one commit)"""
+        if not venues:
+            return
+        query = f'''{self._insert_verb()} INTO venues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._venue_params(v) for v in venues])
+        self._venue_cache.clear()
+        self._venue_arrays = None
+        self.data_version += 1
+
+    @staticmethod
+    def _venue_params(venue: Venue) -> tuple:
+        return (
             venue.venue_id, venue.name, venue.category.value,
-            json.dumps(venue.location), venue.description, venue.rating,
+            _dumps(venue.location), venue.description, venue.rating,
             venue.image_url, venue.address, venue.phone, venue.hours,
             venue.capacity, venue.website, venue.trending_score
         )
-        self.execute_query(query, params)
         
     def get_venue(self, venue_id: str) -> Optional[Venue]:
-        query = 'SELECT * FROM venues WHERE venue_id = ?'
-        result = self.execute_query(query, (venue_id,), fetch=True)
+        # Copy on read, as in get_user
+        venue = self._cache_get(self._venue_cache, venue_id)
+        if venue is not None:
+            return copy.deepcopy(venue)
+        result = self.execute_query(_GET_VENUE_SQL, (venue_id,), fetch=True)
         if result:
-            row = result[0]
-            return Venue(
-                venue_id=row[0], name=row[1],
-                category=VenueCategory(row[2]),
-                location=tuple(json.loads(row[3])),
-                description=row[4], rating=row[5],
-                image_url=row[6], address=row[7], phone=row[8],
-                hours=row[9], capacity=row[10], website=row[11],
-                trending_score=row[12]
-            )
+            venue = self._row_to_venue(result[0])
+            self._cache_put(self._venue_cache, venue_id, venue)
+            return copy.deepcopy(venue)
         return None
+
+    def get_venues_bulk(self, venue_ids: List[str]) -> Dict[str, Venue]:
+        """Fetch many venues in one IN query, keyed by venue_id"""
+        if not venue_ids:
+            return {}
+        placeholders, params = in_clause(venue_ids)
+        query = f'SELECT * FROM venues WHERE venue_id IN ({placeholders})'
+        results = self.execute_query(query, params, fetch=True)
+        return {row[0]: self._row_to_venue(row) for row in results}
         
     def get_all_venues(self) -> List[Venue]:
         query = 'SELECT * FROM venues'
         results = self.execute_query(query, fetch=True)
-        venues = []
-        for row in results:
-            venues.append(Venue(
-                venue_id=row[0], name=row[1],
-                category=VenueCategory(row[2]),
-                location=tuple(json.loads(row[3])),
-                description=row[4], rating=row[5],
-                image_url=row[6], address=row[7], phone=row[8],
-                hours=row[9], capacity=row[10], website=row[11],
-                trending_score=row[12]
-            ))
-        return venues
+        return [self._row_to_venue(row) for row in results]
+
+    def venue_arrays(self) -> VenueArrays:
+        """Structure-of-arrays view of every venue (shared; rebuilt after venue writes)"""
+        arrays = self._venue_arrays
+        if arrays is None:
+            arrays = self._venue_arrays = VenueArrays.build(self.get_all_venues())
+        return arrays
+
+    def get_venues_near(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Venue, float]]:
+        """Venues within radius_km as (venue, distance_km), nearest first.
+
+        The R*Tree narrows candidates to a lat/lon bounding box; exact Haversine
+        distances are only computed for those.
+        """
+        # ~111 km per degree of latitude; a slightly smaller divisor keeps the box conservative
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 1e-6))
+        query = '''SELECT v.* FROM venues_rtree r JOIN venues v ON v.rowid = r.id
+                   WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ?'''
+        results = self.execute_query(query, (lat + dlat, lat - dlat, lon + dlon, lon - dlon), fetch=True)
+        venues = [self._row_to_venue(row) for row in results]
+        if not venues:
+            return []
+        distances = haversine_vec(
+            lat, lon,
+            np.array([v.location[0] for v in venues]),
+            np.array([v.location[1] for v in venues]),
+        )
+        nearby = [(v, d) for v, d in zip(venues, distances.tolist()) if d <= radius_km]
+        nearby.sort(key=lambda x: x[1])
+        return nearby
+
+    def get_trending_venues(self, limit: int = 6) -> List[Venue]:
+        """Top venues by trending score, sorted in SQLite via idx_venues_trending"""
+        query = 'SELECT * FROM venues ORDER BY trending_score DESC LIMIT ?'
+        results = self.execute_query(query, (limit,), fetch=True)
+        return [self._row_to_venue(row) for row in results]
+
+    @staticmethod
+    def _row_to_venue(row) -> Venue:
+        (venue_id, name, category, location, description, rating, image_url,
+         address, phone, hours, capacity, website, trending_score) = row
+        return Venue(
+            venue_id=venue_id, name=name,
+            category=_VENUE_CATEGORY_BY_VALUE[category],
+            location=tuple(_loads(location)),
+            description=description, rating=rating,
+            image_url=image_url, address=address, phone=phone,
+            hours=hours, capacity=capacity, website=website,
+            trending_score=trending_score
+        )
         
     def insert_post(self, post: Post):
         query = '''INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._post_params(post))
+
+    def bulk_insert_posts(self, posts: List[Post]):
+        """Insert many posts in a single transaction (one commit)"""
+        if not posts:
+            return
+        query = f'''{self._insert_verb()} INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._post_params(p) for p in posts])
+
+    @staticmethod
+    def _post_params(post: Post) -> tuple:
+        return (
             post.post_id, post.user_id, post.venue_id, post.content,
             post.image_url, post.likes, post.comments_count,
-            post.created_at.isoformat(), json.dumps(post.tagged_users)
+            post.created_at.isoformat(), _dumps(post.tagged_users)
         )
-        self.execute_query(query, params)
         
     def get_posts(self, limit: int = 50, offset: int = 0) -> List[Post]:
         query = 'SELECT * FROM posts ORDER BY created_at DESC LIMIT ? OFFSET ?'
         results = self.execute_query(query, (limit, offset), fetch=True)
-        posts = []
-        for row in results:
-            posts.append(Post(
-                post_id=row[0], user_id=row[1], venue_id=row[2],
-                content=row[3], image_url=row[4], likes=row[5],
-                comments_count=row[6],
-                created_at=datetime.fromisoformat(row[7]),
-                tagged_users=json.loads(row[8])
-            ))
-        return posts
+        return [self._row_to_post(row) for row in results]
+
+    @staticmethod
+    def _row_to_post(row) -> Post:
+        (post_id, user_id, venue_id, content, image_url, likes, comments_count,
+         created_at, tagged_users) = row
+        return Post(
+            post_id=post_id, user_id=user_id, venue_id=venue_id,
+            content=content, image_url=image_url, likes=likes,
+            comments_count=comments_count,
+            created_at=_parse_dt(created_at),
+            tagged_users=_loads(tagged_users)
+        )
         
     def insert_comment(self, comment: Comment):
         query = '''INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._comment_params(comment))
+
+    def bulk_insert_comments(self, comments: List[Comment]):
+        """Insert many comments in a single transaction (one commit)"""
+        if not comments:
+            return
+        query = f'''{self._insert_verb()} INTO comments VALUES (?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._comment_params(c) for c in comments])
+
+    @staticmethod
+    def _comment_params(comment: Comment) -> tuple:
+        return (
             comment.comment_id, comment.post_id, comment.user_id,
             comment.content, comment.likes, comment.created_at.isoformat()
         )
-        self.execute_query(query, params)
         
     def get_comments(self, post_id: str) -> List[Comment]:
-        query = 'SELECT * FROM comments WHERE post_id = ? ORDER BY created_at DESC'
-        results = self.execute_query(query, (post_id,), fetch=True)
-        comments = []
+        results = self.execute_query(_GET_COMMENTS_SQL, (post_id,), fetch=True)
+        return [self._row_to_comment(row) for row in results]
+
+    def get_comments_bulk(self, post_ids: List[str], per_post: int = 5) -> Dict[str, List[Comment]]:
+        """Newest `per_post` comments for each post, in one windowed query"""
+        comments = {pid: [] for pid in post_ids}
+        if not post_ids:
+            return comments
+        placeholders, params = in_clause(post_ids)
+        query = f'''SELECT comment_id, post_id, user_id, content, likes, created_at FROM (
+                       SELECT *, ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY created_at DESC) AS rn
+                       FROM comments WHERE post_id IN ({placeholders})
+                   ) WHERE rn <= ? ORDER BY post_id, created_at DESC'''
+        results = self.execute_query(query, params + (per_post,), fetch=True)
         for row in results:
-            comments.append(Comment(
-                comment_id=row[0], post_id=row[1], user_id=row[2],
-                content=row[3], likes=row[4],
-                created_at=datetime.fromisoformat(row[5])
-            ))
+            comments[row[1]].append(self._row_to_comment(row))
         return comments
+
+    @staticmethod
+    def _row_to_comment(row) -> Comment:
+        comment_id, post_id, user_id, content, likes, created_at = row
+        return Comment(
+            comment_id=comment_id, post_id=post_id, user_id=user_id,
+            content=content, likes=likes,
+            created_at=_parse_dt(created_at)
+        )
         
     def insert_interaction(self, interaction: Interaction):
         query = '''INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._interaction_params(interaction))
+        self.data_version += 1
+
+    def bulk_insert_interactions(self, interactions: List[Interaction]):
+        """Insert many interactions in a single transaction (one commit)"""
+        if not interactions:
+            return
+        query = f'''{self._insert_verb()} INTO interactions VALUES (?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._interaction_params(i) for i in interactions])
+        self.data_version += 1
+
+    def insert_interactions_async(self, interactions: List[Interaction]):
+        """Queue interactions for the background writer (see flush_writes).
+
+        Raises the error of an earlier failed background write (before queueing)
+        so the caller keeps its interactions and learns the write did not land.
+        """
+        if not interactions:
+            return
+        self._raise_write_error()
+        self._enqueue_write(list(interactions))
+
+    def flush_writes(self):
+        """Block until every queued background write has landed; raises if one failed"""
+        self._write_queue.join()
+        self._raise_write_error()
+
+    def _enqueue_write(self, interactions: List[Interaction]):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+        self._write_queue.put(interactions)
+
+    def _raise_write_error(self):
+        """Re-raise a failed background write, re-queueing its interactions for another attempt"""
+        with self._writer_lock:
+            failure, self._write_error = self._write_error, None
+        if failure is not None:
+            error, interactions = failure
+            self._enqueue_write(interactions)
+            raise error
+
+    def _write_loop(self):
+        while True:
+            batches = [self._write_queue.get()]
+            # Coalesce whatever else is already queued into the same transaction
+            while True:
+                try:
+                    batches.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            interactions = [i for batch in batches for i in batch]
+            try:
+                self.bulk_insert_interactions(interactions)
+            except Exception as e:
+                print(f"⚠️ Background interaction write failed: {e}")
+                # Keep the rows and the error; the next flush_writes/insert_interactions_async raises it
+                with self._writer_lock:
+                    if self._write_error is not None:
+                        interactions = self._write_error[1] + interactions
+                    self._write_error = (e, interactions)
+            finally:
+                for _ in batches:
+                    self._write_queue.task_done()
+
+    @staticmethod
+    def _interaction_params(interaction: Interaction) -> tuple:
+        return (
             interaction.interaction_id, interaction.user_id,
             interaction.venue_id, interaction.interaction_type.value,
             interaction.duration_seconds, interaction.timestamp.isoformat()
         )
-        self.execute_query(query, params)
         
+    def get_interaction_count(self, user_id: str) -> int:
+        """Cheap COUNT(*) used as a version number for cached recommendations"""
+        query = 'SELECT COUNT(*) FROM interactions WHERE user_id = ?'
+        return self.execute_query(query, (user_id,), fetch=True)[0][0]
+
+    def get_interaction_version(self) -> int:
+        """MAX(rowid) over all interactions; grows with every new interaction by anyone"""
+        return self.execute_query('SELECT MAX(rowid) FROM interactions', fetch=True)[0][0] or 0
+
     def get_user_interactions(self, user_id: str) -> List[Interaction]:
-        query = 'SELECT * FROM interactions WHERE user_id = ? ORDER BY timestamp DESC'
-        results = self.execute_query(query, (user_id,), fetch=True)
-        interactions = []
-        for row in results:
-            interactions.append(Interaction(
-                interaction_id=row[0], user_id=row[1], venue_id=row[2],
-                interaction_type=InteractionType(row[3]),
-                duration_seconds=row[4],
-                timestamp=datetime.fromisoformat(row[5])
-            ))
-        return interactions
+        results = self.execute_query(_GET_USER_INTERACTIONS_SQL, (user_id,), fetch=True)
+        return [self._row_to_interaction(row) for row in results]
+
+    def interaction_columns(self, user_id: Optional[str] = None) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """Interactions (all, or one user's) as parallel (user_id, venue_id, type index, duration) columns, newest first"""
+        if user_id is None:
+            query = "SELECT user_id, venue_id, interaction_type, duration_seconds FROM interactions ORDER BY timestamp DESC"
+            rows = self.execute_query(query, fetch=True)
+        else:
+            query = ("SELECT user_id, venue_id, interaction_type, duration_seconds FROM interactions "
+                     "WHERE user_id = ? ORDER BY timestamp DESC")
+            rows = self.execute_query(query, (user_id,), fetch=True)
+        if not rows:
+            return [], [], np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64)
+        user_ids, venue_ids, types, durations = zip(*rows)
+        return (
+            list(user_ids), list(venue_ids),
+            np.array([_INTERACTION_TYPE_INDEX[t] for t in types], dtype=np.int8),
+            np.array(durations, dtype=np.int64),
+        )
+
+    @staticmethod
+    def _row_to_interaction(row) -> Interaction:
+        interaction_id, user_id, venue_id, interaction_type, duration_seconds, timestamp = row
+        return Interaction(
+            interaction_id=interaction_id, user_id=user_id, venue_id=venue_id,
+            interaction_type=_INTERACTION_TYPE_BY_VALUE[interaction_type],
+            duration_seconds=duration_seconds,
+            timestamp=_parse_dt(timestamp)
+        )
         
     def insert_booking(self, booking: Booking):
         query = '''INSERT OR REPLACE INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-        params = (
+        self.execute_query(query, self._booking_params(booking))
+
+    def bulk_insert_bookings(self, bookings: List[Booking]):
+        """Insert many bookings in a single transaction (one commit)"""
+        if not bookings:
+            return
+        query = '''INSERT OR REPLACE INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._booking_params(b) for b in bookings])
+
+    @staticmethod
+    def _booking_params(booking: Booking) -> tuple:
+        return (
             booking.booking_id, booking.user_id, booking.venue_id,
             booking.booking_date.isoformat(), booking.party_size,
             booking.special_notes, booking.qr_code, booking.status,
             booking.created_at.isoformat()
         )
-        self.execute_query(query, params)
         
-    def get_user_bookings(self, user_id: str) -> List[Booking]:
+    def get_user_bookings(self, user_id: str, limit: Optional[int] = None) -> List[Booking]:
         query = 'SELECT * FROM bookings WHERE user_id = ? ORDER BY booking_date DESC'
-        results = self.execute_query(query, (user_id,), fetch=True)
-        bookings = []
-        for row in results:
-            bookings.append(Booking(
-                booking_id=row[0], user_id=row[1], venue_id=row[2],
-                booking_date=datetime.fromisoformat(row[3]),
-                party_size=row[4], special_notes=row[5],
-                qr_code=row[6], status=row[7],
-                created_at=datetime.fromisoformat(row[8])
-            ))
-        return bookings
+        params = (user_id,)
+        if limit is not None:
+            query += ' LIMIT ?'
+            params += (limit,)
+        results = self.execute_query(query, params, fetch=True)
+        return [self._row_to_booking(row) for row in results]
+
+    @staticmethod
+    def _row_to_booking(row) -> Booking:
+        (booking_id, user_id, venue_id, booking_date, party_size, special_notes,
+         qr_code, status, created_at) = row
+        return Booking(
+            booking_id=booking_id, user_id=user_id, venue_id=venue_id,
+            booking_date=_parse_dt(booking_date),
+            party_size=party_size, special_notes=special_notes,
+            qr_code=qr_code, status=status,
+            created_at=_parse_dt(created_at)
+        )
         
     def insert_group(self, group: Group):
         query = '''INSERT OR REPLACE INTO groups VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
-        params = (
+        params = self._group_params(group)
+        # Group row and its membership rows are written in one transaction
+        with self._conn() as conn:
+            conn.execute(query, params)
+            conn.execute('DELETE FROM group_members WHERE group_id = ?', (group.group_id,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO group_members (group_id, user_id) VALUES (?, ?)',
+                [(group.group_id, member) for member in group.members]
+            )
+        
+    def bulk_insert_groups(self, groups: List[Group]):
+        """Insert many groups and their membership rows in a single transaction (one commit)"""
+        if not groups:
+            return
+        query = '''INSERT OR REPLACE INTO groups VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+        with self._write() as conn:
+            conn.executemany(query, [self._group_params(g) for g in groups])
+            conn.executemany(
+                'DELETE FROM group_members WHERE group_id = ?', [(g.group_id,) for g in groups]
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO group_members (group_id, user_id) VALUES (?, ?)',
+                [(g.group_id, member) for g in groups for member in g.members]
+            )
+
+    @staticmethod
+    def _group_params(group: Group) -> tuple:
+        return (
             group.group_id, group.name, group.description,
-            json.dumps(group.members), group.creator_id,
+            _dumps(group.members), group.creator_id,
             group.created_at.isoformat(),
-            json.dumps([cat.value for cat in group.venue_preferences]),
-            json.dumps(group.planned_venues)
+            _dumps([cat.value for cat in group.venue_preferences]),
+            _dumps(group.planned_venues)
         )
-        self.execute_query(query, params)
         
     def get_group(self, group_id: str) -> Optional[Group]:
         query = 'SELECT * FROM groups WHERE group_id = ?'
         result = self.execute_query(query, (group_id,), fetch=True)
         if result:
-            row = result[0]
-            return Group(
-                group_id=row[0], name=row[1], description=row[2],
-                members=json.loads(row[3]), creator_id=row[4],
-                created_at=datetime.fromisoformat(row[5]),
-                venue_preferences=[VenueCategory(cat) for cat in json.loads(row[6])],
-                planned_venues=json.loads(row[7])
-            )
+            return self._row_to_group(result[0])
         return None
         
     def get_user_groups(self, user_id: str) -> List[Group]:
-        query = 'SELECT * FROM groups WHERE creator_id = ? OR members LIKE ?'
-        results = self.execute_query(query, (user_id, f'%{user_id}%'), fetch=True)
-        groups = []
-        for row in results:
-            groups.append(Group(
-                group_id=row[0], name=row[1], description=row[2],
-                members=json.loads(row[3]), creator_id=row[4],
-                created_at=datetime.fromisoformat(row[5]),
-                venue_preferences=[VenueCategory(cat) for cat in json.loads(row[6])],
-                planned_venues=json.loads(row[7])
-            ))
-        return groups
+        # Both branches are index lookups (group_members PK, idx_groups_creator_id)
+        query = '''SELECT * FROM groups
+                   WHERE group_id IN (SELECT group_id FROM group_members WHERE user_id = ?)
+                      OR creator_id = ?
+                   ORDER BY rowid'''
+        results = self.execute_query(query, (user_id, user_id), fetch=True)
+        return [self._row_to_group(row) for row in results]
+
+    @staticmethod
+    def _row_to_group(row) -> Group:
+        (group_id, name, description, members, creator_id, created_at,
+         venue_preferences, planned_venues) = row
+        return Group(
+            group_id=group_id, name=name, description=description,
+            members=_loads(members), creator_id=creator_id,
+            created_at=_parse_dt(created_at),
+            venue_preferences=[_VENUE_CATEGORY_BY_VALUE[cat] for cat in _loads(venue_preferences)],
+            planned_venues=_loads(planned_venues)
+        )
         
     def insert_message(self, message: Message):
         query = '''INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)'''
@@ -522,16 +1097,17 @@ class LunaDatabase:
             results = self.execute_query(query, (group_id, limit), fetch=True)
         else:
             return []
-            
-        messages = []
-        for row in results:
-            messages.append(Message(
-                message_id=row[0], sender_id=row[1], receiver_id=row[2],
-                group_id=row[3], content=row[4],
-                timestamp=datetime.fromisoformat(row[5]),
-                read=row[6]
-            ))
-        return messages
+        return [self._row_to_message(row) for row in results]
+
+    @staticmethod
+    def _row_to_message(row) -> Message:
+        message_id, sender_id, receiver_id, group_id, content, timestamp, read = row
+        return Message(
+            message_id=message_id, sender_id=sender_id, receiver_id=receiver_id,
+            group_id=group_id, content=content,
+            timestamp=_parse_dt(timestamp),
+            read=read
+        )
 
 # ========================= DATASET GENERATOR =========================
 class DatasetGenerator:
@@ -550,25 +1126,53 @@ class DatasetGenerator:
         last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
         interests_pool = ["Italian", "Hiking", "Rooftop Bars", "Coffee", "Art", "Music", "Nightlife", "Beach", "Fitness", "Movies"]
         
-        for i in range(count):
-            user_id = f"user_{i:03d}"
-            username = f"{random.choice(first_names)}_{random.choice(last_names)}{i}".lower()
-            email = f"{username}@example.com"
-            location = random.choice(self.user_locations)
+        # Draws made up front as arrays (see generate_interactions)
+        rng = np.random.default_rng(random.getrandbits(64))
+        first_idx = rng.integers(0, len(first_names), count).tolist()
+        last_idx = rng.integers(0, len(last_names), count).tolist()
+        location_idx = rng.integers(0, len(self.user_locations), count).tolist()
+        days_ago = rng.integers(1, 366, count).tolist()
+        verified = (rng.random(count) > 0.7).tolist()
+        n_interests = rng.integers(2, 6, count)
+        interest_idx = self._sample_rows(rng, len(interests_pool), n_interests).tolist()
+        
+        now = datetime.now()
+        for i, k in enumerate(n_interests.tolist()):
+            username = f"{first_names[first_idx[i]]}_{last_names[last_idx[i]]}{i}".lower()
             
             user = User(
-                user_id=user_id,
+                user_id=f"user_{i:03d}",
                 username=username,
-                email=email,
-                created_at=datetime.now() - timedelta(days=random.randint(1, 365)),
-                location=location,
+                email=f"{username}@example.com",
+                created_at=now - timedelta(days=days_ago[i]),
+                location=self.user_locations[location_idx[i]],
                 bio=f"Exploring NYC and discovering new places!",
                 avatar_url=f"https://i.pravatar.cc/150?img={i}",
-                verified=random.random() > 0.7,
-                interests=random.sample(interests_pool, random.randint(2, 5))
+                verified=verified[i],
+                interests=[interests_pool[j] for j in interest_idx[i][:k]]
             )
             users.append(user)
         return users
+
+    @staticmethod
+    def _sample_rows(rng: np.random.Generator, pool_size: int, sizes: np.ndarray) -> np.ndarray:
+        """
+        Row i's first sizes[i] entries are distinct indices into range(pool_size),
+        i.e. one random.sample() per row drawn in a single batch.
+        """
+        k_max = int(sizes.max(initial=0))
+        if pool_size <= 64:
+            # Small pool: shuffle every row at once via random sort keys
+            return rng.random((len(sizes), pool_size)).argsort(axis=1)[:, :k_max]
+        # Large pool: draw with replacement and redraw the (rare) rows with a repeat
+        picks = rng.integers(0, pool_size, (len(sizes), k_max))
+        while k_max > 1:
+            ordered = np.sort(picks, axis=1)
+            repeats = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+            if not repeats.any():
+                break
+            picks[repeats] = rng.integers(0, pool_size, (int(repeats.sum()), k_max))
+        return picks
         
     def generate_venues(self) -> List[Venue]:
         venues_data = [
@@ -602,8 +1206,9 @@ class DatasetGenerator:
             ("ven_015", "Coney Island Beach", VenueCategory.BEACH, (40.5755, -73.9822), "Classic NYC beach", 4.7, "https://images.unsplash.com/photo-1507525428034-b723cf961d3e?w=400", "Coney Island", "(718) 555-0115", "24 Hours", 10000),
         ]
         
+        trending = np.random.default_rng(random.getrandbits(64)).uniform(0.5, 1.0, len(venues_data)).tolist()
         venues = []
-        for venue_data in venues_data:
+        for venue_data, trending_score in zip(venues_data, trending):
             venue = Venue(
                 venue_id=venue_data[0],
                 name=venue_data[1],
@@ -617,30 +1222,37 @@ class DatasetGenerator:
                 hours=venue_data[9],
                 capacity=venue_data[10],
                 website=f"https://{venue_data[1].lower().replace(' ', '')}.com",
-                trending_score=random.uniform(0.5, 1.0)
+                trending_score=trending_score
             )
             venues.append(venue)
         return venues
         
     def generate_interactions(self, users: List[User], venues: List[Venue], count: int = 200) -> List[Interaction]:
-        interactions = []
-        for i in range(count):
-            interaction_id = f"inter_{i:04d}"
-            user = random.choice(users)
-            venue = random.choice(venues)
-            interaction_type = random.choice(list(InteractionType))
-            duration = random.randint(10, 600) if interaction_type == InteractionType.VIEW else 0
-            
-            interaction = Interaction(
-                interaction_id=interaction_id,
-                user_id=user.user_id,
-                venue_id=venue.venue_id,
-                interaction_type=interaction_type,
-                duration_seconds=duration,
-                timestamp=datetime.now() - timedelta(days=random.randint(0, 30))
+        # All random draws are made up front as arrays; the rng is seeded from
+        # `random` so random.seed() still makes a whole demo dataset reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        interaction_types = list(InteractionType)
+        user_idx = rng.integers(0, len(users), count)
+        venue_idx = rng.integers(0, len(venues), count)
+        type_idx = rng.integers(0, len(interaction_types), count)
+        durations = rng.integers(10, 601, count)
+        days_ago = rng.integers(0, 31, count)
+
+        now = datetime.now()
+        return [
+            Interaction(
+                interaction_id=f"inter_{i:04d}",
+                user_id=users[u].user_id,
+                venue_id=venues[v].venue_id,
+                interaction_type=interaction_types[t],
+                duration_seconds=d if interaction_types[t] == InteractionType.VIEW else 0,
+                timestamp=now - timedelta(days=days)
             )
-            interactions.append(interaction)
-        return interactions
+            for i, (u, v, t, d, days) in enumerate(zip(
+                user_idx.tolist(), venue_idx.tolist(), type_idx.tolist(),
+                durations.tolist(), days_ago.tolist()
+            ))
+        ]
         
     def generate_posts(self, users: List[User], venues: List[Venue], count: int = 100) -> List[Post]:
         posts = []
@@ -655,21 +1267,32 @@ class DatasetGenerator:
             "Can't wait to come back"
         ]
         
-        for i in range(count):
-            post_id = f"post_{i:04d}"
-            user = random.choice(users)
-            venue = random.choice(venues) if random.random() > 0.3 else None
+        # Draws made up front as arrays (see generate_interactions)
+        rng = np.random.default_rng(random.getrandbits(64))
+        user_idx = rng.integers(0, len(users), count).tolist()
+        has_venue = (rng.random(count) > 0.3).tolist()
+        venue_idx = rng.integers(0, len(venues), count).tolist()
+        caption_idx = rng.integers(0, len(captions), count).tolist()
+        likes = rng.integers(0, 501, count).tolist()
+        comments_count = rng.integers(0, 101, count).tolist()
+        days_ago = rng.integers(0, 31, count).tolist()
+        n_tagged = rng.integers(0, 4, count)
+        tagged_idx = self._sample_rows(rng, len(users), n_tagged).tolist()
+        
+        now = datetime.now()
+        for i, k in enumerate(n_tagged.tolist()):
+            venue = venues[venue_idx[i]] if has_venue[i] else None
             
             post = Post(
-                post_id=post_id,
-                user_id=user.user_id,
+                post_id=f"post_{i:04d}",
+                user_id=users[user_idx[i]].user_id,
                 venue_id=venue.venue_id if venue else None,
-                content=random.choice(captions),
+                content=captions[caption_idx[i]],
                 image_url=venue.image_url if venue else "https://images.unsplash.com/photo-1504384308090-c894fdcc538d?w=400",
-                likes=random.randint(0, 500),
-                comments_count=random.randint(0, 100),
-                created_at=datetime.now() - timedelta(days=random.randint(0, 30)),
-                tagged_users=random.sample([u.user_id for u in users], k=random.randint(0, 3))
+                likes=likes[i],
+                comments_count=comments_count[i],
+                created_at=now - timedelta(days=days_ago[i]),
+                tagged_users=[users[j].user_id for j in tagged_idx[i][:k]]
             )
             posts.append(post)
         return posts
@@ -687,29 +1310,240 @@ class DatasetGenerator:
             "Just went there yesterday, loved it!"
         ]
         
+        # Draws made up front as arrays (see generate_interactions)
+        rng = np.random.default_rng(random.getrandbits(64))
+        post_idx = rng.integers(0, len(posts), count).tolist()
+        user_idx = rng.integers(0, len(users), count).tolist()
+        text_idx = rng.integers(0, len(comment_texts), count).tolist()
+        likes = rng.integers(0, 51, count).tolist()
+        days_ago = rng.integers(0, 31, count).tolist()
+        
+        now = datetime.now()
         for i in range(count):
-            comment_id = f"comment_{i:04d}"
-            post = random.choice(posts)
-            user = random.choice(users)
-            
             comment = Comment(
-                comment_id=comment_id,
-                post_id=post.post_id,
-                user_id=user.user_id,
-                content=random.choice(comment_texts),
-                likes=random.randint(0, 50),
-                created_at=datetime.now() - timedelta(days=random.randint(0, 30))
+                comment_id=f"comment_{i:04d}",
+                post_id=posts[post_idx[i]].post_id,
+                user_id=users[user_idx[i]].user_id,
+                content=comment_texts[text_idx[i]],
+                likes=likes[i],
+                created_at=now - timedelta(days=days_ago[i])
             )
             comments.append(comment)
         return comments
 
+# ========================= SPATIAL KERNELS =========================
+EARTH_RADIUS_KM = 6371.0
+
+def _haversine_vec_numpy(ulat: float, ulon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1 = np.radians(ulat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons - ulon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _haversine_vec_numba(ulat, ulon, lats, lons, out):
+        lat1 = math.radians(ulat)
+        cos_lat1 = math.cos(lat1)
+        for i in prange(lats.shape[0]):
+            lat2 = math.radians(lats[i])
+            dlat = lat2 - lat1
+            dlon = math.radians(lons[i] - ulon)
+            a = math.sin(dlat / 2) ** 2 + cos_lat1 * math.cos(lat2) * math.sin(dlon / 2) ** 2
+            out[i] = EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+def haversine_vec(ulat: float, ulon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Haversine distance (km) from one point to arrays of lat/lon in one batched call"""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        out = np.empty(lats.shape[0], dtype=np.float64)
+        _haversine_vec_numba(float(ulat), float(ulon), lats, lons, out)
+        return out
+    return _haversine_vec_numpy(ulat, ulon, lats, lons)
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine distance (km) between two points (JIT-compiled when numba is available)"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+if NUMBA_AVAILABLE:
+    haversine = njit(cache=True, fastmath=True)(haversine)
+
+def _haversine_vec_rad_numpy(ulat, ulon, lat_rad, lon_rad, cos_lat):
+    lat1 = np.radians(ulat)
+    dlat = lat_rad - lat1
+    dlon = lon_rad - np.radians(ulon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * cos_lat * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _haversine_vec_rad_numba(ulat, ulon, lat_rad, lon_rad, cos_lat, out):
+        lat1 = math.radians(ulat)
+        lon1 = math.radians(ulon)
+        cos_lat1 = math.cos(lat1)
+        for i in prange(lat_rad.shape[0]):
+            dlat = lat_rad[i] - lat1
+            dlon = lon_rad[i] - lon1
+            a = math.sin(dlat / 2) ** 2 + cos_lat1 * cos_lat[i] * math.sin(dlon / 2) ** 2
+            out[i] = EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+def haversine_vec_rad(ulat: float, ulon: float, lat_rad: np.ndarray, lon_rad: np.ndarray,
+                      cos_lat: np.ndarray) -> np.ndarray:
+    """haversine_vec for targets pre-converted to radians with cos(lat) precomputed"""
+    lat_rad = np.ascontiguousarray(lat_rad, dtype=np.float64)
+    lon_rad = np.ascontiguousarray(lon_rad, dtype=np.float64)
+    cos_lat = np.ascontiguousarray(cos_lat, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        out = np.empty(lat_rad.shape[0], dtype=np.float64)
+        _haversine_vec_rad_numba(float(ulat), float(ulon), lat_rad, lon_rad, cos_lat, out)
+        return out
+    return _haversine_vec_rad_numpy(ulat, ulon, lat_rad, lon_rad, cos_lat)
+
+# ========================= SCORING KERNELS =========================
+# Weights for [rating, distance, trending, category, capacity] venue features
+VENUE_FEATURE_WEIGHTS = np.array([0.25, 0.25, 0.2, 0.25, 0.05])
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_venues_numba(matrix, weights, ml_scores, ml_weight, interest_boost, category_boost, out):
+        for i in prange(matrix.shape[0]):
+            acc = 0.0
+            for j in range(matrix.shape[1]):
+                acc += matrix[i, j] * weights[j]
+            acc = (1.0 - ml_weight) * acc + ml_weight * ml_scores[i]
+            out[i] = min(1.0, acc + interest_boost[i] + category_boost[i])
+
+def score_venues(matrix: np.ndarray, weights: np.ndarray, interest_boost: np.ndarray,
+                 category_boost: np.ndarray, ml_scores: Optional[np.ndarray] = None,
+                 ml_weight: float = 0.0) -> np.ndarray:
+    """
+    Final venue scores from an (N, D) feature matrix: the weighted feature sum,
+    optionally blended with ranker predictions, plus both boosts, capped at 1
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    weights = np.ascontiguousarray(weights, dtype=np.float64)
+    interest_boost = np.ascontiguousarray(interest_boost, dtype=np.float64)
+    category_boost = np.ascontiguousarray(category_boost, dtype=np.float64)
+    if ml_scores is None:
+        ml_scores, ml_weight = np.zeros(matrix.shape[0]), 0.0
+    ml_scores = np.ascontiguousarray(ml_scores, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        out = np.empty(matrix.shape[0], dtype=np.float64)
+        _score_venues_numba(matrix, weights, ml_scores, float(ml_weight), interest_boost, category_boost, out)
+        return out
+    base = (1.0 - ml_weight) * (matrix @ weights) + ml_weight * ml_scores
+    return np.minimum(1.0, base + interest_boost + category_boost)
+
+# Ranker labels by interaction type: LIKE / SAVE / VISIT are positive, NaN means
+# no label (VIEW is then relabelled by duration)
+_LABEL_BY_TYPE = np.array([
+    1.0 if t in (InteractionType.LIKE, InteractionType.SAVE, InteractionType.VISIT) else np.nan
+    for t in InteractionType
+])
+_VIEW_INDEX = _INTERACTION_TYPE_INDEX[InteractionType.VIEW.value]
+# Interaction types that count towards a profile's category engagement
+_PROFILE_INTERACTIONS = np.array([
+    t in (InteractionType.VIEW, InteractionType.LIKE, InteractionType.SAVE, InteractionType.VISIT)
+    for t in InteractionType
+])
+
+def interaction_labels(type_idx: np.ndarray, duration: np.ndarray) -> np.ndarray:
+    """Ranker label per interaction (NaN = unlabelled) via table lookup and masks, no branches"""
+    labels = _LABEL_BY_TYPE[type_idx]
+    view = type_idx == _VIEW_INDEX
+    labels[view & (duration <= 15)] = 0.0
+    labels[view & (duration >= 60)] = 1.0
+    return labels
+
+def _fold_labels(user_idx, venue_idx, labels, n_venues, out_user, out_venue, out_label):
+    # Interactions arrive grouped by user; slot[v] is v's output row for the
+    # current user, so each (user, venue) pair is emitted once, in order of its
+    # first labelled interaction, keeping the strongest label
+    slot = np.full(n_venues, -1, dtype=np.int64)
+    n = 0
+    segment = 0
+    for i in range(user_idx.shape[0]):
+        if i > 0 and user_idx[i] != user_idx[i - 1]:
+            for k in range(segment, n):
+                slot[out_venue[k]] = -1
+            segment = n
+        v = venue_idx[i]
+        label = labels[i]
+        if v < 0 or np.isnan(label):
+            continue
+        s = slot[v]
+        if s < 0:
+            slot[v] = n
+            out_user[n] = user_idx[i]
+            out_venue[n] = v
+            out_label[n] = label
+            n += 1
+        else:
+            out_label[s] = max(out_label[s], label)
+    return n
+
+if NUMBA_AVAILABLE:
+    _fold_labels = njit(cache=True)(_fold_labels)
+
+def fold_interaction_labels(user_idx: np.ndarray, venue_idx: np.ndarray, type_idx: np.ndarray,
+                            duration: np.ndarray, n_venues: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse interactions (sorted by user; venue_idx -1 for unknown venues) into
+    one (user, venue, label) training pair per distinct labelled pair
+    """
+    size = user_idx.shape[0]
+    out_user = np.empty(size, dtype=np.int64)
+    out_venue = np.empty(size, dtype=np.int64)
+    out_label = np.empty(size, dtype=np.float64)
+    labels = interaction_labels(np.asarray(type_idx, dtype=np.intp), np.asarray(duration))
+    n = _fold_labels(
+        np.ascontiguousarray(user_idx, dtype=np.int64), np.ascontiguousarray(venue_idx, dtype=np.int64),
+        labels, n_venues, out_user, out_venue, out_label,
+    )
+    return out_user[:n], out_venue[:n], out_label[:n]
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, by partial selection (O(N)
+    plus a sort of the k winners). Ties keep index order, like a stable sort.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = scores.shape[0]
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = np.partition(scores, n - k)[n - k]  # k-th largest score
+    above = np.flatnonzero(scores > kth)
+    # Earliest of the scores tied at the cut-off fill the remaining slots
+    chosen = np.concatenate([above, np.flatnonzero(scores == kth)[:k - above.size]])
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+def warm_kernels():
+    """Compile (or load from cache) the JIT kernels before the first request needs them"""
+    if NUMBA_AVAILABLE:
+        haversine(0.0, 0.0, 0.0, 0.0)
+        haversine_vec(0.0, 0.0, np.zeros(1), np.zeros(1))
+        haversine_vec_rad(0.0, 0.0, np.zeros(1), np.zeros(1), np.ones(1))
+        score_venues(np.zeros((1, VENUE_FEATURE_WEIGHTS.shape[0])), VENUE_FEATURE_WEIGHTS, np.zeros(1), np.zeros(1))
+        fold_interaction_labels(np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1), 1)
+
 # ========================= RECOMMENDATION ENGINE =========================
 class RecommendationEngine:
     def __init__(self, db: LunaDatabase):
         self.db = db
         self.scaler = StandardScaler()
-        self.venue_embeddings = {}
-        self.user_profiles = {}
+        self.rank_model: Optional[RandomForestRegressor] = None
+        self.training_samples = 0
+        # user_id -> (db.data_version, profile); entries expire like the db entity caches
+        self._profile_cache: Dict[str, Tuple[float, Tuple[int, Dict]]] = {}
+        self._all_profiles_cache: Dict[str, Tuple[float, Tuple[int, Dict[str, Dict]]]] = {}
 
     def train_ranker_from_interactions(self, min_samples: int = 50):
         """
@@ -720,61 +1554,63 @@ class RecommendationEngine:
         - VIEW with long duration        -> positive
         - VIEW with very short duration  -> negative
         """
-        X, y = [], []
-
         user_ids = self.db.get_all_user_ids()
         if not user_ids:
             return
 
-        for uid in user_ids:
-            profile = self.build_user_profile(uid)
-            interactions = self.db.get_user_interactions(uid)
-
-            # Aggregate strongest signal per (user,venue)
-            venue_label = {}  # (venue_id -> best_label_so_far)
-            for inter in interactions:
-                label = None
-                if inter.interaction_type in (
-                    InteractionType.LIKE,
-                    InteractionType.SAVE,
-                    InteractionType.VISIT,
-                ):
-                    label = 1.0
-                elif inter.interaction_type == InteractionType.VIEW:
-                    if inter.duration_seconds <= 15:
-                        label = 0.0
-                    elif inter.duration_seconds >= 60:
-                        label = 1.0
-
-                if label is None:
-                    continue
-
-                prev = venue_label.get(inter.venue_id, 0.0)
-                # Keep the strongest positive signal
-                venue_label[inter.venue_id] = max(prev, label)
-
-            for vid, label in venue_label.items():
-                venue = self.db.get_venue(vid)
-                if not venue:
-                    continue
-                feats = self.get_venue_features(venue, profile)
-                X.append(feats)
-                y.append(label)
-
-        if len(X) < min_samples:
-            print(f"⚠️ Not enough samples to train ranker (got {len(X)}).")
+        profiles = self.build_user_profiles(user_ids)
+        arrays = self.db.venue_arrays()
+        category_component = self._category_affinity(profiles, arrays.category_idx)
+        venue_columns = arrays.columns
+
+        # Interactions as index arrays grouped by user (newest first within a
+        # user), folded into the strongest label per (user, venue) in one kernel pass
+        user_row = {uid: u for u, uid in enumerate(user_ids)}
+        inter_users, inter_venues, type_idx, durations = self.db.interaction_columns()
+        user_idx = np.array([user_row.get(uid, -1) for uid in inter_users], dtype=np.int64)
+        venue_idx = np.array([arrays.index.get(vid, -1) for vid in inter_venues], dtype=np.int64)
+        known = np.flatnonzero(user_idx >= 0)
+        order = known[np.argsort(user_idx[known], kind="stable")]
+        pair_user, pair_venue, y = fold_interaction_labels(
+            user_idx[order], venue_idx[order], type_idx[order], durations[order], len(arrays.venues)
+        )
+
+        if len(y) < min_samples:
+            print(f"⚠️ Not enough samples to train ranker (got {len(y)}).")
             return
 
-        X = np.asarray(X)
-        y = np.asarray(y)
+        # Distances for each user's pairs: one JIT kernel call per user over every venue
+        distances = np.empty(len(y))
+        bounds = np.searchsorted(pair_user, np.arange(len(user_ids) + 1))
+        for u, profile in enumerate(profiles):
+            lo, hi = bounds[u], bounds[u + 1]
+            if lo == hi:
+                continue
+            user_lat, user_lon = profile["location"]
+            distances[lo:hi] = haversine_vec_rad(user_lat, user_lon, *venue_columns[:, 3:6].T)[pair_venue[lo:hi]]
 
-        # Scale + fit model
+        # Same columns as get_venue_features, gathered for every pair at once
+        X = np.column_stack([
+            venue_columns[pair_venue, 0],
+            np.maximum(0, 1 - distances / 10),
+            venue_columns[pair_venue, 1],
+            category_component[pair_user, pair_venue],
+            venue_columns[pair_venue, 2],
+        ])
+
+        # Fit the scaler once and keep its parameters as plain arrays, so scaling
+        # is one broadcast op instead of a validated sklearn transform call
         self.scaler.fit(X)
-        X_scaled = self.scaler.transform(X)
+        self._scaler_mean = self.scaler.mean_
+        self._scaler_scale = self.scaler.scale_
+        X_scaled = self.scale_features(X)
 
+        # 32 shallow trees are plenty for interaction-log sample sizes; X is
+        # already float32, so fit skips its own conversion copy
         rf = RandomForestRegressor(
-            n_estimators=80,
+            n_estimators=32,
             max_depth=6,
+            n_jobs=-1,
             random_state=42,
         )
         rf.fit(X_scaled, y)
@@ -782,71 +1618,145 @@ class RecommendationEngine:
         self.rank_model = rf
         self.training_samples = len(X)
         print(f"✅ Trained RandomForest ranker on {len(X)} samples.")
+
+    def scale_features(self, X: np.ndarray) -> np.ndarray:
+        """Apply the fitted scaler, emitting float32 (the dtype the forest's trees use)"""
+        X = np.asarray(X, dtype=np.float64)
+        return ((X - self._scaler_mean) / self._scaler_scale).astype(np.float32)
+
+    @staticmethod
+    def _category_affinity(profiles: List[Dict], category_idx: np.ndarray) -> np.ndarray:
+        """
+        Category feature for every (user, venue) pair as one (users x venues) matrix.
+
+        Users become rows of per-category engagement, venues one-hot category rows,
+        so a single matmul against the one-hot matrix scores all pairs at once.
+        """
+        engagement = np.zeros((len(profiles), len(VenueCategory)))
+        engaged = np.zeros_like(engagement)
+        for r, profile in enumerate(profiles):
+            for category, score in profile["category_scores"].items():
+                engagement[r, _VENUE_CATEGORY_INDEX[category]] = score
+                engaged[r, _VENUE_CATEGORY_INDEX[category]] = 1.0
+        onehot = np.zeros((len(category_idx), len(VenueCategory)))
+        onehot[np.arange(len(category_idx)), category_idx] = 1.0
+        # Engaged categories score their engagement; others fall back to 0.5 * 0.1
+        return np.where(engaged @ onehot.T > 0, engagement @ onehot.T, 0.05)
         
     def calculate_distance(self, loc1: Tuple[float, float], loc2: Tuple[float, float]) -> float:
         """Calculate Haversine distance between two coordinates"""
-        lat1, lon1 = loc1
-        lat2, lon2 = loc2
-        R = 6371  # Earth's radius in km
-        
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
+        return haversine(float(loc1[0]), float(loc1[1]), float(loc2[0]), float(loc2[1]))
+
+    @staticmethod
+    def calculate_distances(origin: Tuple[float, float], lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Haversine distances (km) from one coordinate to arrays of lat/lon"""
+        return haversine_vec(origin[0], origin[1], lats, lons)
         
     def build_user_profile(self, user_id: str) -> Dict:
-        """Build comprehensive user behavior profile"""
+        """Build comprehensive user behavior profile (cached until the next db write)"""
+        version = self.db.data_version
+        cached = LunaDatabase._cache_get(self._profile_cache, user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        profile = self._build_user_profile(user_id)
+        LunaDatabase._cache_put(self._profile_cache, user_id, (version, profile))
+        return profile
+
+    def _build_user_profile(self, user_id: str) -> Dict:
         user = self.db.get_user(user_id)
-        interactions = self.db.get_user_interactions(user_id)
-        
-        # Calculate interaction metrics
-        category_engagement = defaultdict(lambda: {"views": 0, "likes": 0, "saves": 0, "visits": 0})
-        total_view_time = 0
-        
-        for interaction in interactions:
-            venue = self.db.get_venue(interaction.venue_id)
-            if venue:
-                category = venue.category.value
-                if interaction.interaction_type == InteractionType.VIEW:
-                    category_engagement[category]["views"] += 1
-                    total_view_time += interaction.duration_seconds
-                elif interaction.interaction_type == InteractionType.LIKE:
-                    category_engagement[category]["likes"] += 1
-                elif interaction.interaction_type == InteractionType.SAVE:
-                    category_engagement[category]["saves"] += 1
-                elif interaction.interaction_type == InteractionType.VISIT:
-                    category_engagement[category]["visits"] += 1
-        
-        # Normalize engagement scores
-        category_scores = {}
-        for category, metrics in category_engagement.items():
-            score = (metrics["views"] * 0.3 + metrics["likes"] * 1.0 + 
-                    metrics["saves"] * 1.5 + metrics["visits"] * 2.0)
-            category_scores[category] = score
+        _, venue_ids, type_idx, durations = self.db.interaction_columns(user_id)
+        user_idx = np.zeros(len(venue_ids), dtype=np.intp)
+        return self._profiles_from_interactions([user], user_idx, venue_ids, type_idx, durations)[0]
+
+    def _profiles_from_interactions(self, users: List[User], user_idx: np.ndarray, venue_ids: List[str],
+                                    type_idx: np.ndarray, durations: np.ndarray) -> List[Dict]:
+        """Profiles for users from their interactions as columns (user_idx = row in users)"""
+        arrays = self.db.venue_arrays()
+        n_users, n_cats, n_types = len(users), len(VenueCategory), len(InteractionType)
+        
+        # Category index of each interaction's venue (-1 if the venue is gone)
+        rows = np.array([arrays.index.get(vid, -1) for vid in venue_ids], dtype=np.intp)
+        known = rows >= 0
+        category_idx = np.full(len(rows), -1, dtype=np.intp)
+        category_idx[known] = arrays.category_idx[rows[known]]
+        is_view = type_idx == _VIEW_INDEX
+        
+        # (user x category x interaction type) counts in one bincount
+        engaged = known & _PROFILE_INTERACTIONS[type_idx]
+        user_category = user_idx[engaged] * n_cats + category_idx[engaged]
+        counts = np.bincount(
+            user_category * n_types + type_idx[engaged], minlength=n_users * n_cats * n_types
+        ).reshape(n_users, n_cats, n_types)
+        views, likes, saves, visits = (
+            counts[:, :, _INTERACTION_TYPE_INDEX[t.value]]
+            for t in (InteractionType.VIEW, InteractionType.LIKE, InteractionType.SAVE, InteractionType.VISIT)
+        )
+        scores = (views * 0.3 + likes * 1.0 + saves * 1.5 + visits * 2.0).tolist()
+        view_time = known & is_view
+        total_view_time = np.bincount(user_idx[view_time], weights=durations[view_time], minlength=n_users)
+        view_counts = np.bincount(user_idx[is_view], minlength=n_users)
+        engagement = np.bincount(user_idx, minlength=n_users)
+        
+        # Each user's engaged categories, in order of first interaction
+        category_scores = [{} for _ in users]
+        seen, first = np.unique(user_category, return_index=True)
+        for key in seen[np.lexsort((first, seen // n_cats))].tolist():
+            u, k = divmod(key, n_cats)
+            category_scores[u][_VENUE_CATEGORY_VALUES[k]] = scores[u][k]
             
-        return {
-            "user_id": user_id,
-            "location": user.location,
-            "interests": user.interests,
-            "category_scores": category_scores,
-            "total_engagement": len(interactions),
-            "avg_view_time": total_view_time / max(len([i for i in interactions if i.interaction_type == InteractionType.VIEW]), 1)
-        }
+        return [
+            {
+                "user_id": user.user_id,
+                "location": user.location,
+                "interests": user.interests,
+                "interests_set": frozenset(user.interests),
+                "category_scores": category_scores[u],
+                "total_engagement": int(engagement[u]),
+                "avg_view_time": int(total_view_time[u]) / max(int(view_counts[u]), 1)
+            }
+            for u, user in enumerate(users)
+        ]
         
-    def get_venue_features(self, venue: Venue, user_profile: Dict) -> np.ndarray:
-        """Extract features for a venue"""
-        distance = self.calculate_distance(user_profile["location"], venue.location)
+    def build_user_profiles(self, user_ids: List[str]) -> List[Dict]:
+        """build_user_profile for many users, in order (from one pass over all interactions)"""
+        profiles = self._all_profiles()
+        return [profiles[uid] if uid in profiles else self.build_user_profile(uid) for uid in user_ids]
+
+    def _all_profiles(self) -> Dict[str, Dict]:
+        """user_id -> profile for every user, built together (cached like build_user_profile)"""
+        version = self.db.data_version
+        cached = LunaDatabase._cache_get(self._all_profiles_cache, "all")
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        users = self.db.get_all_users()
+        user_row = {u.user_id: r for r, u in enumerate(users)}
+        inter_users, venue_ids, type_idx, durations = self.db.interaction_columns()
+        user_idx = np.array([user_row.get(uid, -1) for uid in inter_users], dtype=np.intp)
+        keep = np.flatnonzero(user_idx >= 0)
+        profiles = self._profiles_from_interactions(
+            users, user_idx[keep], [venue_ids[i] for i in keep.tolist()], type_idx[keep], durations[keep]
+        )
+        by_id = {p["user_id"]: p for p in profiles}
+        LunaDatabase._cache_put(self._all_profiles_cache, "all", (version, by_id))
+        return by_id
+
+    def get_venue_features(self, venue: Venue, user_profile: Dict, distance: Optional[float] = None,
+                           category_component: Optional[float] = None) -> np.ndarray:
+        """Extract features for a venue (distance / category term may be precomputed in batch)"""
+        if distance is None:
+            distance = self.calculate_distance(user_profile["location"], venue.location)
         distance_score = max(0, 1 - distance / 10)  # Normalize by 10km
         
-        category_match = 1.0 if venue.category.value in user_profile["category_scores"] else 0.5
-        category_engagement = user_profile["category_scores"].get(venue.category.value, 0.1)
+        if category_component is None:
+            category_match = 1.0 if venue.category.value in user_profile["category_scores"] else 0.5
+            category_engagement = user_profile["category_scores"].get(venue.category.value, 0.1)
+            category_component = category_match * category_engagement
         
         features = np.array([
             venue.rating / 5.0,  # Rating (normalized)
             distance_score,  # Distance score
             venue.trending_score,  # Trending score
-            category_match * category_engagement,  # Category engagement
+            category_component,  # Category engagement
             venue.capacity / 1000  # Capacity (normalized)
         ])
         return features
@@ -854,49 +1764,79 @@ class RecommendationEngine:
     def recommend_venues(self, user_id: str, limit: int = 10, show_reasoning: bool = False) -> Tuple[List[Tuple[Venue, float]], Dict]:
         """Get personalized venue recommendations with reasoning"""
         user_profile = self.build_user_profile(user_id)
-        all_venues = self.db.get_all_venues()
+        arrays = self.db.venue_arrays()
+        all_venues = arrays.venues
         
-        scored_venues = []
-        reasoning_details = []
+        # Skip venues the user has already booked (one set, O(1) per venue)
+        booked_ids = {booking.venue_id for booking in self.db.get_user_bookings(user_id)}
         
-        for venue in all_venues:
-            # Skip if user has already visited (booked) this venue
-            if venue.venue_id in [booking.venue_id for booking in self.db.get_user_bookings(user_id)]:
-                pass  # Still allow in recs for demo; remove this 'pass' to filter
+        feature_matrix = self._venue_feature_matrix(user_profile, arrays)
         
-            features = self.get_venue_features(venue, user_profile)
-            base_score = np.sum(features * np.array([0.25, 0.25, 0.2, 0.25, 0.05]))
-            
-            # Boost for matching interests
-            interest_boost = 0
-            for interest in user_profile["interests"]:
-                if interest.lower() in venue.name.lower() or interest.lower() in venue.description.lower():
-                    interest_boost += 0.15
-                    
-            # Boost for category preference
-            category_boost = user_profile["category_scores"].get(venue.category.value, 0) * 0.1
-            
-            final_score = min(1.0, base_score + interest_boost + category_boost)
-            scored_venues.append((venue, final_score, interest_boost, category_boost))
-            
-            reasoning_details.append({
-                "venue": venue.name,
-                "rating_component": features[0],
-                "distance_component": features[1],
-                "trending_component": features[2],
-                "category_component": features[3],
-                "interest_boost": interest_boost,
-                "category_boost": category_boost,
-                "final_score": final_score
-            })
+        # Blend in the trained ranker: one batched predict over every venue's row
+        ml_scores = None
+        if self.rank_model is not None:
+            ml_scores = self.rank_model.predict(self.scale_features(feature_matrix))
+        
+        # Boost for matching interests: +0.15 per interest found in name or description
+        interest_boost = np.zeros(len(all_venues))
+        for interest in user_profile["interests"]:
+            interest_boost[arrays.rows_containing(interest)] += 0.15
+        
+        # Boost for category preference
+        category_boost = self._category_weights(user_profile, 0.0)[arrays.category_idx] * 0.1
         
-        # Sort by score and return top venues
-        scored_venues.sort(key=lambda x: x[1], reverse=True)
-        recommendations = [(v, s) for v, s, _, _ in scored_venues[:limit]]
+        # Weighted sum, ranker blend, boosts and the 1.0 cap in one parallel pass over venues
+        final_scores = score_venues(
+            feature_matrix, VENUE_FEATURE_WEIGHTS, interest_boost, category_boost,
+            ml_scores=ml_scores, ml_weight=0.5,
+        )
+        
+        # Top `limit` unbooked venues, best first; ties keep venue order as before
+        candidates = np.flatnonzero([v.venue_id not in booked_ids for v in all_venues])
+        top = candidates[top_k_indices(final_scores[candidates], limit)].tolist()
+        recommendations = [(all_venues[i], float(final_scores[i])) for i in top]
+        reasoning_details = [
+            {
+                "venue": all_venues[i].name,
+                "rating_component": feature_matrix[i, 0],
+                "distance_component": feature_matrix[i, 1],
+                "trending_component": feature_matrix[i, 2],
+                "category_component": feature_matrix[i, 3],
+                "interest_boost": float(interest_boost[i]),
+                "category_boost": float(category_boost[i]),
+                "ml_score": float(ml_scores[i]) if ml_scores is not None else None,
+                "final_score": float(final_scores[i])
+            }
+            for i in top
+        ]
         
-        reasoning_details.sort(key=lambda x: x["final_score"], reverse=True)
+        return recommendations, {
+            "algorithm": "Hybrid Recommendation Engine",
+            "training_samples": self.training_samples,
+            "details": reasoning_details,
+        }
+
+    def _venue_feature_matrix(self, user_profile: Dict, arrays: VenueArrays) -> np.ndarray:
+        """(N_venues, 5) matrix of get_venue_features rows, built column-wise"""
+        # Static venue columns come pre-scaled from the snapshot; distances to every
+        # venue in one batched kernel call
+        columns = arrays.columns
+        user_lat, user_lon = user_profile["location"]
+        distances = haversine_vec_rad(user_lat, user_lon, *columns[:, 3:6].T)
+        return np.column_stack([
+            columns[:, 0],
+            np.maximum(0, 1 - distances / 10),
+            columns[:, 1],
+            # Engaged categories score their engagement; others fall back to 0.5 * 0.1
+            self._category_weights(user_profile, 0.05)[arrays.category_idx],
+            columns[:, 2],
+        ])
         
-        return recommendations, {"algorithm": "Hybrid Recommendation Engine", "details": reasoning_details[:limit]}
+    @staticmethod
+    def _category_weights(user_profile: Dict, default: float) -> np.ndarray:
+        """Profile category scores as one array indexed by VenueCategory position"""
+        category_scores = user_profile["category_scores"]
+        return np.array([category_scores.get(c.value, default) for c in VenueCategory])
         
     def recommend_users(self, user_id: str, limit: int = 5) -> List[Tuple[User, float]]:
         """Recommend compatible users based on interests and behavior"""
@@ -904,38 +1844,47 @@ class RecommendationEngine:
         target_profile = self.build_user_profile(user_id)
         
         # Get all other users
-        all_users = []
-        i = 0
-        while True:
-            user = self.db.get_user(f"user_{i:03d}")
-            if not user:
-                break
-            if user.user_id != user_id and user.user_id not in target_user.blocked_users:
-                all_users.append(user)
-            i += 1
+        blocked = set(target_user.blocked_users)
+        all_users = [
+            u for u in self.db.get_all_users()
+            if u.user_id != user_id and u.user_id not in blocked
+        ]
         
-        scored_users = []
-        for other_user in all_users:
-            other_profile = self.build_user_profile(other_user.user_id)
-            
-            # Interest overlap
-            interest_overlap = len(set(target_profile["interests"]) & set(other_profile["interests"])) / max(len(set(target_profile["interests"]) | set(other_profile["interests"])), 1)
-            
-            # Category preference similarity
-            target_categories = set(target_profile["category_scores"].keys())
-            other_categories = set(other_profile["category_scores"].keys())
-            category_overlap = len(target_categories & other_categories) / max(len(target_categories | other_categories), 1)
-            
-            # Location proximity
-            distance = self.calculate_distance(target_profile["location"], other_profile["location"])
-            location_score = max(0, 1 - distance / 20)
-            
-            # Combined compatibility score
-            compatibility_score = (interest_overlap * 0.4 + category_overlap * 0.35 + location_score * 0.25)
-            scored_users.append((other_user, compatibility_score))
+        if not all_users:
+            return []
+        
+        # Row 0 is the target user, rows 1..N the candidates
+        profiles = [target_profile] + self.build_user_profiles([u.user_id for u in all_users])
+        
+        # Interest overlap (Jaccard over each profile's precomputed interest set)
+        interest_overlap = self._jaccard_with_first([p["interests_set"] for p in profiles])
         
-        scored_users.sort(key=lambda x: x[1], reverse=True)
-        return scored_users[:limit]
+        # Category preference similarity (Jaccard over engaged categories; dict
+        # key views intersect like sets without being copied into one)
+        category_overlap = self._jaccard_with_first([p["category_scores"].keys() for p in profiles])
+        
+        # Location proximity
+        target_lat, target_lon = target_profile["location"]
+        distances = haversine_vec(
+            target_lat, target_lon,
+            np.array([p["location"][0] for p in profiles[1:]]),
+            np.array([p["location"][1] for p in profiles[1:]]),
+        )
+        location_score = np.maximum(0, 1 - distances / 20)
+        
+        # Combined compatibility score
+        compatibility = interest_overlap * 0.4 + category_overlap * 0.35 + location_score * 0.25
+        scores = compatibility.tolist()
+        return [(all_users[i], scores[i]) for i in top_k_indices(compatibility, limit).tolist()]
+
+    @staticmethod
+    def _jaccard_with_first(sets: List[AbstractSet[str]]) -> np.ndarray:
+        """Jaccard similarity of sets[0] against every other set"""
+        target, others = sets[0], sets[1:]
+        intersection = np.array([len(target & other) for other in others], dtype=np.float64)
+        sizes = np.array([len(other) for other in others], dtype=np.float64)
+        union = sizes + len(target) - intersection
+        return intersection / np.maximum(union, 1)
         
     def recommend_groups(self, user_id: str, limit: int = 5) -> List[Tuple[Group, float]]:
         """Recommend groups based on user interests"""
@@ -950,7 +1899,7 @@ class RecommendationEngine:
                 
             # Interest overlap with group preferences
             if group.venue_preferences:
-                preference_overlap = len(set(user_profile["category_scores"].keys()) & 
+                preference_overlap = len(user_profile["category_scores"].keys() & 
                                        {cat.value for cat in group.venue_preferences}) / len(group.venue_preferences)
             else:
                 preference_overlap = 0.5
@@ -961,35 +1910,44 @@ class RecommendationEngine:
             score = preference_overlap * 0.6 + size_score * 0.4
             scored_groups.append((group, score))
         
-        scored_groups.sort(key=lambda x: x[1], reverse=True)
-        return scored_groups[:limit]
+        top = top_k_indices(np.array([score for _, score in scored_groups]), limit)
+        return [scored_groups[i] for i in top.tolist()]
 
 # ========================= AI AGENT =========================
 
 
 
 # ========================= BOOKING & QR CODE =========================
+# One QRCode encoder and PNG buffer reused across bookings (guarded: Streamlit
+# sessions run on separate threads)
+_QR = qrcode.QRCode(
+    version=1,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    box_size=10,
+    border=4,
+)
+_QR_BUFFER = BytesIO()
+_QR_LOCK = threading.Lock()
+
 class BookingManager:
     @staticmethod
     def create_qr_code(booking: Booking, user: User, venue: Venue) -> str:
         """Generate QR code for booking"""
         booking_info = f"LUNA_BOOKING|{booking.booking_id}|{user.user_id}|{venue.venue_id}|{booking.booking_date.isoformat()}|{booking.party_size}"
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(booking_info)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        with _QR_LOCK:
+            _QR.clear()
+            _QR.version = 1  # make(fit=True) grows the version; start each fit from 1 again
+            _QR.add_data(booking_info)
+            _QR.make(fit=True)
+            
+            img = _QR.make_image(fill_color="black", back_color="white")
+            
+            # Convert to base64
+            _QR_BUFFER.seek(0)
+            _QR_BUFFER.truncate()
+            img.save(_QR_BUFFER, format="PNG")
+            img_str = base64.b64encode(_QR_BUFFER.getvalue()).decode()
         
         return f"data:image/png;base64,{img_str}"
         
@@ -1013,42 +1971,23 @@ class LunaSystem:
         if self.initialized:
             return
             
+        # Compile (or load) the JIT kernels here rather than in the constructor: app.py runs
+        # this on a background thread, so a cold numba cache never blocks the first render
+        warm_kernels()
         print("🚀 Initializing Luna Social with demo data...")
         
-        # Generate users
+        # Generate everything first so the seeding transaction (which holds the
+        # write lock) covers only the inserts
         users = self.generator.generate_users(20)
-        for user in users:
-            self.db.insert_user(user)
-        print(f"✅ Created {len(users)} users")
-        
-        # Generate venues
         venues = self.generator.generate_venues()
-        for venue in venues:
-            self.db.insert_venue(venue)
-        print(f"✅ Created {len(venues)} venues")
-        
-        # Generate interactions
         interactions = self.generator.generate_interactions(users, venues, 200)
-        for interaction in interactions:
-            self.db.insert_interaction(interaction)
-        print(f"✅ Created {len(interactions)} interactions")
-        
-        # Generate posts
         posts = self.generator.generate_posts(users, venues, 100)
-        for post in posts:
-            self.db.insert_post(post)
-        print(f"✅ Created {len(posts)} posts")
-        
-        # Generate comments
         comments = self.generator.generate_comments(posts, users, 150)
-        for comment in comments:
-            self.db.insert_comment(comment)
-        print(f"✅ Created {len(comments)} comments")
-        
+
         # Create some groups
         group_names = ["NYC Foodies", "Hiking Enthusiasts", "Nightlife Crew", "Art Lovers"]
-        for i, group_name in enumerate(group_names):
-            group = Group(
+        groups = [
+            Group(
                 group_id=f"group_{i:02d}",
                 name=group_name,
                 description=f"A group of {group_name.lower()}",
@@ -1057,21 +1996,20 @@ class LunaSystem:
                 created_at=datetime.now(),
                 venue_preferences=random.sample(list(VenueCategory), random.randint(1, 3))
             )
-            self.db.insert_group(group)
-        print(f"✅ Created {len(group_names)} groups")
+            for i, group_name in enumerate(group_names)
+        ]
 
         # === Demo enrichment for hero user (user_000) ===
         hero_user = users[0]  # user_000
         hero_venues = venues[:5]  # first few venues as favorites
 
-        # Make hero user member of all groups
-        all_groups = [self.db.get_group(f"group_{i:02d}") for i in range(len(group_names))]
-        for g in all_groups:
-            if g and hero_user.user_id not in g.members:
+        # Make hero user member of all groups before they are written
+        for g in groups:
+            if hero_user.user_id not in g.members:
                 g.members.append(hero_user.user_id)
-                self.db.insert_group(g)
 
         # Create a couple of bookings for hero user
+        bookings = []
         for v in hero_venues[:3]:
             booking = Booking(
                 booking_id=BookingManager.generate_booking_id(),
@@ -1084,11 +2022,24 @@ class LunaSystem:
                 created_at=datetime.now()
             )
             booking.qr_code = BookingManager.create_qr_code(booking, hero_user, v)
-            self.db.insert_booking(booking)
+            bookings.append(booking)
             hero_user.bookings.append(booking.booking_id)
 
-        # Save updated hero user
-        self.db.insert_user(hero_user)
+        # One transaction for the whole seed, one executemany per table
+        with self.db.bulk_load():
+            self.db.bulk_insert_users(users)
+            print(f"✅ Created {len(users)} users")
+            self.db.bulk_insert_venues(venues)
+            print(f"✅ Created {len(venues)} venues")
+            self.db.bulk_insert_interactions(interactions)
+            print(f"✅ Created {len(interactions)} interactions")
+            self.db.bulk_insert_posts(posts)
+            print(f"✅ Created {len(posts)} posts")
+            self.db.bulk_insert_comments(comments)
+            print(f"✅ Created {len(comments)} comments")
+            self.db.bulk_insert_groups(groups)
+            print(f"✅ Created {len(groups)} groups")
+            self.db.bulk_insert_bookings(bookings)
         
         self.initialized = True
         print("✨ Luna Social initialized successfully!")
@@ -1,7 +1,6 @@
-import json
 from datetime import datetime, timedelta
 import random
-from database import Database
+from database import Database, json_list
 from models import RecommendationEngine
 
 class BookingAgent:
@@ -49,7 +48,7 @@ class BookingAgent:
     def _find_companions(self, user_id, count=1):
         """Agent finds compatible companions from social network"""
         user = self.db.get_user(user_id)
-        user_interests = json.loads(user['interests']) if user['interests'] else []
+        user_interests = json_list(user['interests'])
         
         all_users = self.db.get_all_users()
         potential_companions = []
@@ -58,7 +57,7 @@ class BookingAgent:
             if other_user['id'] == user_id:
                 continue
             
-            other_interests = json.loads(other_user['interests']) if other_user['interests'] else []
+            other_interests = json_list(other_user['interests'])
             common_interests = len(set(user_interests) & set(other_interests))
             
             if common_interests > 0:
@@ -112,7 +111,7 @@ class BookingAgent:
         if not booking_record:
             return {'status': 'failed'}
         
-        companion_ids = json.loads(booking_record['companion_ids']) if booking_record['companion_ids'] else []
+        companion_ids = json_list(booking_record['companion_ids'])
         venue = self.db.get_venue(booking_record['venue_id'])
         
         invites = []
@@ -238,9 +237,10 @@ class AnalyticsAgent:
         
         # Popular venues for user
         bookings = self.db.get_user_bookings(user_id)
+        venues = self.db.get_venues_by_ids([b['venue_id'] for b in bookings])
         venue_visits = {}
         for booking in bookings:
-            venue = self.db.get_venue(booking['venue_id'])
+            venue = venues.get(booking['venue_id'])
             if venue['category'] not in venue_visits:
                 venue_visits[venue['category']] = 0
             venue_visits[venue['category']] += 1
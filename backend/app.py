@@ -1,20 +1,81 @@
+import os
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from database import Database
+from database import Database, json_list
 from models import RecommendationEngine
 from agents import BookingAgent, NotificationAgent, AnalyticsAgent
 from data_generator import DataGenerator
-import json
+from tracking import TrackingQueue
+import geo
+
+try:
+    import orjson
+except ImportError:  # fall back to Flask's stdlib json provider
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # serve responses uncompressed
+    Compress = None
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+    # Keys stay sorted like Flask's default provider, so responses keep their shape
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype="application/json")
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
+# Compress JSON bodies over 1 KB (user/venue lists, bookings); tiny status payloads aren't worth it
+app.config.update(
+    COMPRESS_MIMETYPES=['application/json'],
+    COMPRESS_MIN_SIZE=1024,
+    COMPRESS_ALGORITHM=['br', 'zstd', 'gzip'],
+    COMPRESS_LEVEL=4,
+    COMPRESS_BR_LEVEL=4,
+)
+if Compress is not None:
+    Compress(app)
+
 # Initialize services
 db = Database()
 engine = RecommendationEngine()
 booking_agent = BookingAgent()
 notification_agent = NotificationAgent()
 analytics_agent = AnalyticsAgent()
+tracker = TrackingQueue()
+geo.warm_up()  # compile the distance kernel now rather than on the first request
+
+# Encoded full-table responses, keyed by endpoint and stored with the table version they were
+# built from. Users and venues are append-only, so a version check replaces re-reading and
+# re-encoding the table, and stays correct when another worker process does the writing.
+_response_cache = {}
+
+def cached_json_response(key, version, build):
+    """Serve build()'s JSON from _response_cache while version matches, with an ETag for 304s"""
+    entry = _response_cache.get(key)
+    if entry is None or entry[0] != version:
+        entry = (version, jsonify(build()).get_data())
+        _response_cache[key] = entry
+    response = app.response_class(entry[1], mimetype='application/json')
+    response.set_etag('%s-%s-%s' % (key, *version))
+    return response.make_conditional(request)
 
 # ==================== DATA ENDPOINTS ====================
 
@@ -47,19 +108,15 @@ def init_data():
 @app.route('/api/users', methods=['GET'])
 def get_users():
     """Get all users"""
-    users = db.get_all_users()
-    result = []
-    for user in users:
-        result.append({
-            'id': user['id'],
-            'username': user['username'],
-            'bio': user['bio'],
-            'profile_pic': user['profile_pic'],
-            'interests': json.loads(user['interests']) if user['interests'] else [],
-            'latitude': user['latitude'],
-            'longitude': user['longitude']
-        })
-    return jsonify(result)
+    return cached_json_response('users', db.get_users_version(), lambda: [{
+        'id': user['id'],
+        'username': user['username'],
+        'bio': user['bio'],
+        'profile_pic': user['profile_pic'],
+        'interests': json_list(user['interests']),
+        'latitude': user['latitude'],
+        'longitude': user['longitude']
+    } for user in db.get_all_users()])
 
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
@@ -73,7 +130,7 @@ def get_user(user_id):
         'username': user['username'],
         'bio': user['bio'],
         'profile_pic': user['profile_pic'],
-        'interests': json.loads(user['interests']) if user['interests'] else [],
+        'interests': json_list(user['interests']),
         'latitude': user['latitude'],
         'longitude': user['longitude']
     })
@@ -81,21 +138,7 @@ def get_user(user_id):
 @app.route('/api/venues', methods=['GET'])
 def get_venues():
     """Get all venues"""
-    venues = db.get_all_venues()
-    result = []
-    for venue in venues:
-        result.append({
-            'id': venue['id'],
-            'name': venue['name'],
-            'category': venue['category'],
-            'rating': venue['rating'],
-            'latitude': venue['latitude'],
-            'longitude': venue['longitude'],
-            'description': venue['description'],
-            'capacity': venue['capacity'],
-            'image_url': venue['image_url']
-        })
-    return jsonify(result)
+    return cached_json_response('venues', db.get_venues_version(), db.get_all_venues_as_dicts)
 
 # ==================== RECOMMENDATION ENDPOINTS ====================
 
@@ -140,16 +183,16 @@ def nearby_venues(user_id):
 
 @app.route('/api/track-engagement', methods=['POST'])
 def track_engagement():
-    """Track post engagement (time spent viewing)"""
+    """Track post engagement (time spent viewing); written in the background"""
     data = request.json
     
-    result = engine.track_engagement(
+    tracker.track_post_view(
         data['post_id'],
         data['user_id'],
         data['time_spent']
     )
     
-    return jsonify(result)
+    return jsonify({'status': 'queued', 'time': data['time_spent']})
 
 @app.route('/api/engagement-stats/<int:user_id>', methods=['GET'])
 def get_engagement_stats(user_id):
@@ -185,19 +228,17 @@ def smart_recommendation(user_id):
 def get_bookings(user_id):
     """Get user's bookings"""
     bookings = db.get_user_bookings(user_id)
+    venues = db.get_venues_by_ids([b['venue_id'] for b in bookings])
     
-    result = []
-    for booking in bookings:
-        venue = db.get_venue(booking['venue_id'])
-        result.append({
-            'id': booking['id'],
-            'venue': venue['name'] if venue else 'Unknown',
-            'venue_id': booking['venue_id'],
-            'booking_date': booking['booking_date'],
-            'party_size': booking['party_size'],
-            'status': booking['status'],
-            'companions': json.loads(booking['companion_ids']) if booking['companion_ids'] else []
-        })
+    result = [{
+        'id': booking['id'],
+        'venue': venues[booking['venue_id']]['name'] if booking['venue_id'] in venues else 'Unknown',
+        'venue_id': booking['venue_id'],
+        'booking_date': booking['booking_date'],
+        'party_size': booking['party_size'],
+        'status': booking['status'],
+        'companions': json_list(booking['companion_ids'])
+    } for booking in bookings]
     
     return jsonify({
         'user_id': user_id,
@@ -209,33 +250,25 @@ def get_bookings(user_id):
 @app.route('/api/groups', methods=['GET'])
 def get_groups():
     """Get all groups"""
-    groups = db.get_all_groups()
-    
-    result = []
-    for group in groups:
-        result.append({
-            'id': group['id'],
-            'name': group['name'],
-            'description': group['description'],
-            'interest_tag': group['interest_tag'],
-            'member_count': group['member_count']
-        })
+    result = [{
+        'id': group['id'],
+        'name': group['name'],
+        'description': group['description'],
+        'interest_tag': group['interest_tag'],
+        'member_count': group['member_count']
+    } for group in db.get_all_groups()]
     
     return jsonify(result)
 
 @app.route('/api/user-groups/<int:user_id>', methods=['GET'])
 def get_user_groups(user_id):
     """Get groups user belongs to"""
-    groups = db.get_user_groups(user_id)
-    
-    result = []
-    for group in groups:
-        result.append({
-            'id': group['id'],
-            'name': group['name'],
-            'interest_tag': group['interest_tag'],
-            'member_count': group['member_count']
-        })
+    result = [{
+        'id': group['id'],
+        'name': group['name'],
+        'interest_tag': group['interest_tag'],
+        'member_count': group['member_count']
+    } for group in db.get_user_groups(user_id)]
     
     return jsonify({
         'user_id': user_id,
@@ -246,18 +279,16 @@ def get_user_groups(user_id):
 def get_user_posts(user_id):
     """Get user's posts"""
     posts = db.get_user_posts(user_id)
+    venues = db.get_venues_by_ids([p['venue_id'] for p in posts])
     
-    result = []
-    for post in posts:
-        venue = db.get_venue(post['venue_id']) if post['venue_id'] else None
-        result.append({
-            'id': post['id'],
-            'user_id': post['user_id'],
-            'venue_name': venue['name'] if venue else 'Check-in',
-            'caption': post['caption'],
-            'image_url': post['image_url'],
-            'created_at': post['created_at']
-        })
+    result = [{
+        'id': post['id'],
+        'user_id': post['user_id'],
+        'venue_name': venues[post['venue_id']]['name'] if post['venue_id'] in venues else 'Check-in',
+        'caption': post['caption'],
+        'image_url': post['image_url'],
+        'created_at': post['created_at']
+    } for post in posts]
     
     return jsonify(result)
 
@@ -292,29 +323,22 @@ def get_compatibility(user_id_1, user_id_2):
 
 @app.route('/api/track-filter', methods=['POST'])
 def track_filter():
-    """Track filter interaction for recommendations"""
+    """Track filter interaction for recommendations; written in the background"""
     data = request.json
     
-    db.track_filter_interaction(
+    tracker.track_filter(
         data['user_id'],
         data['filter_type'],
         data['filter_value']
     )
     
-    return jsonify({'status': 'tracked'})
+    return jsonify({'status': 'queued'})
 
 @app.route('/api/filter-history/<int:user_id>', methods=['GET'])
 def get_filter_history(user_id):
     """Get user's filter interaction history"""
-    history = db.get_user_filter_history(user_id)
-    
-    result = []
-    for h in history:
-        result.append({
-            'filter_type': h['filter_type'],
-            'filter_value': h['filter_value'],
-            'interaction_count': h['interaction_count']
-        })
+    # Rows already carry exactly filter_type, filter_value and interaction_count
+    result = [dict(h) for h in db.get_user_filter_history(user_id)]
     
     return jsonify({
         'user_id': user_id,
@@ -344,4 +368,5 @@ def index():
     })
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', port=5000)
\ No newline at end of file
@@ -1,6 +1,5 @@
 from database import Database
 import random
-import json
 
 class DataGenerator:
     def __init__(self):
@@ -25,10 +24,8 @@ class DataGenerator:
             ('hannah', 40.7549, -73.9840, ['wine', 'fine dining', 'art'], 'Wine connoisseur'),
         ]
         
-        user_ids = {}
-        for username, lat, lon, interests, bio in users_data:
-            user_id = self.db.add_user(username, lat, lon, interests, bio)
-            user_ids[username] = user_id
+        user_ids = self.db.add_users_bulk(users_data)
+        for username, *_ in users_data:
             print(f"✓ Created user: {username}")
         
         # === VENUES ===
@@ -50,10 +47,8 @@ class DataGenerator:
             ('Sant Ambroeus', 40.7505, -73.9934, 'restaurant', 4.7, 'Italian caffe'),
         ]
         
-        venue_ids = {}
-        for name, lat, lon, cat, rating, desc in venues_data:
-            venue_id = self.db.add_venue(name, lat, lon, cat, rating, desc)
-            venue_ids[name] = venue_id
+        venue_ids = self.db.add_venues_bulk(venues_data)
+        for name, *_ in venues_data:
             print(f"✓ Created venue: {name}")
         
         # === GROUPS ===
@@ -66,10 +61,8 @@ class DataGenerator:
             ('Wine Club', 'Wine tastings and bar recommendations', 'wine'),
         ]
         
-        group_ids = {}
-        for name, desc, tag in groups_data:
-            group_id = self.db.create_group(name, desc, tag)
-            group_ids[name] = group_id
+        group_ids = self.db.create_groups_bulk(groups_data)
+        for name, _, _ in groups_data:
             print(f"✓ Created group: {name}")
         
         # === ADD USERS TO GROUPS ===
@@ -82,12 +75,11 @@ class DataGenerator:
             'Wine Club': ['hannah', 'bob', 'charlie'],
         }
         
-        for group_name, members in group_assignments.items():
-            for member in members:
-                try:
-                    self.db.add_group_member(group_ids[group_name], user_ids[member])
-                except:
-                    pass  # Skip if already exists
+        self.db.add_group_members_bulk([
+            (group_ids[group_name], user_ids[member])
+            for group_name, members in group_assignments.items()
+            for member in members
+        ])
         
         print(f"✓ Assigned users to groups")
         
@@ -103,29 +95,30 @@ class DataGenerator:
             (user_ids['george'], venue_ids['Rockefeller Center'], '📸 NYC skyline views are insane'),
         ]
         
-        for user_id, venue_id, caption in posts:
-            post_id = self.db.add_post(user_id, venue_id, caption)
+        post_ids = self.db.add_posts_bulk(posts)
+        views = []
+        for post_id, (user_id, venue_id, caption) in zip(post_ids, posts):
             # Track some views
             random_viewers = random.sample(list(user_ids.values()), k=random.randint(2, 5))
             for viewer_id in random_viewers:
                 if viewer_id != user_id:
                     time_spent = random.randint(10, 120)
-                    self.db.track_post_view(post_id, viewer_id, time_spent)
+                    views.append((post_id, viewer_id, time_spent))
+        self.db.track_post_views_bulk(views)
         
         print(f"✓ Created posts with engagement tracking")
         
         # === FILTER INTERACTIONS ===
-        for username, user_id in list(user_ids.items())[:5]:
-            user = self.db.get_user(user_id)
-            interests = json.loads(user['interests'])
+        filter_interactions = []
+        # Interests are already in users_data; no need to read them back from the db
+        for username, lat, lon, interests, bio in users_data[:5]:
+            user_id = user_ids[username]
             
             for interest in interests:
                 # Each user interacts with their interests multiple times
                 for _ in range(random.randint(2, 5)):
-                    try:
-                        self.db.track_filter_interaction(user_id, 'category', interest)
-                    except:
-                        pass  # Skip if error
+                    filter_interactions.append((user_id, 'category', interest))
+        self.db.track_filter_interactions_bulk(filter_interactions)
         
         print(f"✓ Created filter interaction history")
         
@@ -137,11 +130,7 @@ class DataGenerator:
             (user_ids['alice'], venue_ids['Mercury Lounge'], '2024-12-23 21:00', 2, [user_ids['charlie']]),
         ]
         
-        for user_id, venue_id, date, party_size, companions in bookings:
-            try:
-                booking_id = self.db.add_booking(user_id, venue_id, date, party_size, companions)
-            except:
-                pass  # Skip if already exists
+        self.db.add_bookings_bulk(bookings)
         
         print(f"✓ Created bookings")
         
@@ -1,8 +1,35 @@
 import sqlite3
 import json
+import functools
 from datetime import datetime, timedelta
 import random
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+@functools.lru_cache(maxsize=4096)
+def _decode_json_list(text):
+    return tuple(_loads(text))
+
+
+def json_list(value):
+    """Decode a JSON array column (interests, companion_ids); cached per distinct value, read-only"""
+    return _decode_json_list(value) if value else ()
+
+
+TRACK_FILTER_SQL = '''
+    INSERT INTO filter_interactions (user_id, filter_type, filter_value, interaction_count)
+    VALUES (?, ?, ?, 1)
+    ON CONFLICT(user_id, filter_type, filter_value) DO UPDATE SET
+    interaction_count = interaction_count + 1,
+    last_used = CURRENT_TIMESTAMP
+'''
+
+
 class Database:
     def __init__(self, db_name="venue_recommendations.db"):
         self.db_name = db_name
@@ -17,6 +44,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # WAL lets readers in other workers proceed while one writer commits (persists in the db file)
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -144,6 +174,13 @@ class Database:
             )
         ''')
         
+        # Per-user lookups, ordered the way the queries below read them
+        # (filter upserts already use the UNIQUE(user_id, filter_type, filter_value) index)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_posts_user ON posts(user_id, created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_user ON bookings(user_id, booking_date DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members(user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_filter_user_count ON filter_interactions(user_id, interaction_count DESC, filter_type, filter_value)')
+        
         conn.commit()
         conn.close()
     
@@ -160,6 +197,23 @@ class Database:
         conn.close()
         return user_id
     
+    def add_users_bulk(self, users):
+        """Insert many (username, latitude, longitude, interests, bio) users in one transaction; returns {username: id}"""
+        rows = [(username, latitude, longitude, json.dumps(interests), bio, f"https://i.pravatar.cc/150?u={username}")
+                for username, latitude, longitude, interests, bio in users]
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO users (username, latitude, longitude, interests, bio, profile_pic)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+        usernames = [row[0] for row in rows]
+        cursor = conn.execute(f"SELECT id, username FROM users WHERE username IN ({','.join('?' * len(usernames))}) ORDER BY id",
+                              usernames)
+        user_ids = {row['username']: row['id'] for row in cursor.fetchall()}
+        conn.close()
+        return user_ids
+    
     def get_user(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -176,6 +230,15 @@ class Database:
         conn.close()
         return users
     
+    def get_users_version(self):
+        """Cheap change marker for the (append-only) users table"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), MAX(id) FROM users')
+        version = tuple(cursor.fetchone())
+        conn.close()
+        return version
+    
     # ==================== VENUE QUERIES ====================
     def add_venue(self, name, latitude, longitude, category, rating, description):
         conn = self.get_connection()
@@ -190,6 +253,23 @@ class Database:
         conn.close()
         return venue_id
     
+    def add_venues_bulk(self, venues):
+        """Insert many (name, latitude, longitude, category, rating, description) venues in one transaction; returns {name: id}"""
+        rows = [(name, latitude, longitude, category, rating, description, random.randint(20, 200),
+                 f"https://via.placeholder.com/400?text={name}")
+                for name, latitude, longitude, category, rating, description in venues]
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO venues (name, latitude, longitude, category, rating, description, capacity, image_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        names = [row[0] for row in rows]
+        cursor = conn.execute(f"SELECT id, name FROM venues WHERE name IN ({','.join('?' * len(names))}) ORDER BY id", names)
+        venue_ids = {row['name']: row['id'] for row in cursor.fetchall()}
+        conn.close()
+        return venue_ids
+    
     def get_venue(self, venue_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -198,6 +278,18 @@ class Database:
         conn.close()
         return venue
     
+    def get_venues_by_ids(self, venue_ids):
+        """Fetch many venues in one query; returns {venue_id: row} (missing ids are absent)"""
+        ids = list({vid for vid in venue_ids if vid is not None})
+        if not ids:
+            return {}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM venues WHERE id IN ({','.join('?' * len(ids))})", ids)
+        venues = {venue['id']: venue for venue in cursor.fetchall()}
+        conn.close()
+        return venues
+    
     def get_all_venues(self):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -206,6 +298,27 @@ class Database:
         conn.close()
         return venues
     
+    def get_all_venues_as_dicts(self):
+        """All venues as plain dicts in the /api/venues response shape"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, category, rating, latitude, longitude, description, capacity, image_url
+            FROM venues
+        ''')
+        venues = [dict(venue) for venue in cursor.fetchall()]
+        conn.close()
+        return venues
+    
+    def get_venues_version(self):
+        """Cheap change marker for the (append-only) venues table"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), MAX(id) FROM venues')
+        version = tuple(cursor.fetchone())
+        conn.close()
+        return version
+    
     # ==================== POST QUERIES ====================
     def add_post(self, user_id, venue_id, caption):
         conn = self.get_connection()
@@ -219,6 +332,20 @@ class Database:
         conn.close()
         return post_id
     
+    def add_posts_bulk(self, posts):
+        """Insert many (user_id, venue_id, caption) posts in one transaction; returns their ids in order"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO posts (user_id, venue_id, caption, image_url)
+                VALUES (?, ?, ?, ?)
+            ''', [(user_id, venue_id, caption, f"https://via.placeholder.com/600?text=Post")
+                  for user_id, venue_id, caption in posts])
+            # Rowids are handed out consecutively within the transaction, ending at the new MAX(id)
+            last_id = conn.execute('SELECT MAX(id) FROM posts').fetchone()[0]
+        conn.close()
+        return list(range(last_id - len(posts) + 1, last_id + 1))
+    
     def track_post_view(self, post_id, user_id, time_spent):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -229,6 +356,16 @@ class Database:
         conn.commit()
         conn.close()
     
+    def track_post_views_bulk(self, views):
+        """Record many (post_id, user_id, time_spent) views in one transaction"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO post_views (post_id, user_id, time_spent, viewed_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', views)
+        conn.close()
+    
     def get_user_posts(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -241,16 +378,17 @@ class Database:
     def track_filter_interaction(self, user_id, filter_type, filter_value):
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO filter_interactions (user_id, filter_type, filter_value, interaction_count)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(user_id, filter_type, filter_value) DO UPDATE SET
-            interaction_count = interaction_count + 1,
-            last_used = CURRENT_TIMESTAMP
-        ''', (user_id, filter_type, filter_value))
+        cursor.execute(TRACK_FILTER_SQL, (user_id, filter_type, filter_value))
         conn.commit()
         conn.close()
     
+    def track_filter_interactions_bulk(self, interactions):
+        """Record many (user_id, filter_type, filter_value) interactions in one transaction"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany(TRACK_FILTER_SQL, interactions)
+        conn.close()
+    
     def get_user_filter_history(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -258,7 +396,7 @@ class Database:
             SELECT filter_type, filter_value, interaction_count 
             FROM filter_interactions 
             WHERE user_id = ? 
-            ORDER BY interaction_count DESC
+            ORDER BY interaction_count DESC, filter_type, filter_value
         ''', (user_id,))
         history = cursor.fetchall()
         conn.close()
@@ -277,6 +415,20 @@ class Database:
         conn.close()
         return group_id
     
+    def create_groups_bulk(self, groups):
+        """Insert many (name, description, interest_tag) groups in one transaction; returns {name: id}"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO groups (name, description, interest_tag)
+                VALUES (?, ?, ?)
+            ''', groups)
+        names = [name for name, _, _ in groups]
+        cursor = conn.execute(f"SELECT id, name FROM groups WHERE name IN ({','.join('?' * len(names))}) ORDER BY id", names)
+        group_ids = {row['name']: row['id'] for row in cursor.fetchall()}
+        conn.close()
+        return group_ids
+    
     def add_group_member(self, group_id, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -288,6 +440,23 @@ class Database:
         conn.commit()
         conn.close()
     
+    def add_group_members_bulk(self, pairs):
+        """Add many (group_id, user_id) memberships in one transaction, skipping existing ones"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO group_members (group_id, user_id)
+                VALUES (?, ?)
+            ''', pairs)
+            group_ids = list({group_id for group_id, _ in pairs})
+            conn.execute(f'''
+                UPDATE groups SET member_count = (
+                    SELECT COUNT(*) FROM group_members WHERE group_id = groups.id
+                )
+                WHERE id IN ({','.join('?' * len(group_ids))})
+            ''', group_ids)
+        conn.close()
+    
     def get_user_groups(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -321,6 +490,17 @@ class Database:
         conn.close()
         return booking_id
     
+    def add_bookings_bulk(self, bookings):
+        """Insert many (user_id, venue_id, booking_date, party_size, companion_ids) bookings in one transaction"""
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO bookings (user_id, venue_id, booking_date, party_size, companion_ids, agent_generated)
+                VALUES (?, ?, ?, ?, ?, 1)
+            ''', [(user_id, venue_id, booking_date, party_size, json.dumps(companion_ids) if companion_ids else None)
+                  for user_id, venue_id, booking_date, party_size, companion_ids in bookings])
+        conn.close()
+    
     def get_user_bookings(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -0,0 +1,26 @@
+import math
+
+# Optional JIT for the scalar distance kernel (plain Python math when unavailable)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distance in kilometers between two coordinates (JIT-compiled when numba is available)"""
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = math.sin(d_lat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon/2)**2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+if NUMBA_AVAILABLE:
+    haversine = njit(cache=True, fastmath=True)(haversine)
+
+
+def warm_up():
+    """Compile (or load from cache) the JIT kernel before the first request needs it"""
+    haversine(0.0, 0.0, 0.0, 0.0)
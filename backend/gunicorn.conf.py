@@ -0,0 +1,8 @@
+# Production server for the API (picked up automatically):  cd backend && gunicorn app:app
+# gevent workers let one process keep serving while others wait on SQLite or the models.
+import multiprocessing
+
+bind = "0.0.0.0:5000"
+workers = multiprocessing.cpu_count()
+worker_class = "gevent"
+worker_connections = 1000
@@ -1,24 +1,65 @@
 import numpy as np
-import json
+from scipy.spatial import cKDTree
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import MinMaxScaler
 import math
-from database import Database
+from database import Database, json_list
+from geo import haversine, EARTH_RADIUS_KM
 
 class RecommendationEngine:
     def __init__(self):
         self.db = Database()
         self.scaler = MinMaxScaler()
+        self._venues_version = None
+        self._load_venue_coordinates()
     
     # ==================== SPATIAL ANALYSIS ====================
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two coordinates in kilometers"""
-        R = 6371  # Earth's radius in km
-        d_lat = math.radians(lat2 - lat1)
-        d_lon = math.radians(lon2 - lon1)
-        a = math.sin(d_lat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
+        return haversine(float(lat1), float(lon1), float(lat2), float(lon2))
+    
+    def haversine_distances(self, lat, lon, lat_rad, lon_rad, cos_lat):
+        """Distances in kilometers from one coordinate (degrees) to points given in radians with cos(lat)"""
+        lat1 = math.radians(lat)
+        d_lat = lat_rad - lat1
+        d_lon = lon_rad - math.radians(lon)
+        a = np.sin(d_lat/2)**2 + math.cos(lat1) * cos_lat * np.sin(d_lon/2)**2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
+    def _unit_vectors(self, lat_rad, lon_rad, cos_lat):
+        """Points on the unit sphere, so straight-line (chord) distance grows with great-circle distance"""
+        return np.column_stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)])
+    
+    def _load_venue_coordinates(self):
+        """Cache venue rows, their coordinates in radians (plus cos(lat)) and a KD-tree,
+        rebuilding only when the venues table changes"""
+        version = self.db.get_venues_version()
+        if version != self._venues_version:
+            self.venues = self.db.get_all_venues()
+            self.venue_lat_rad = np.radians(np.asarray([v['latitude'] for v in self.venues], dtype=np.float64))
+            self.venue_lon_rad = np.radians(np.asarray([v['longitude'] for v in self.venues], dtype=np.float64))
+            self.venue_cos_lat = np.cos(self.venue_lat_rad)
+            self.venue_tree = cKDTree(
+                self._unit_vectors(self.venue_lat_rad, self.venue_lon_rad, self.venue_cos_lat).reshape(-1, 3))
+            self._venues_version = version
+        return self.venues
+    
+    def _venues_within(self, lat, lon, radius_km):
+        """Indices of venues within radius_km, closest first (ties keep table order), and their distances"""
+        # Chord length for the radius' central angle; the tree only narrows candidates,
+        # exact haversine below decides membership
+        angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        chord = 2 * math.sin(angle / 2) * (1 + 1e-9)
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        point = self._unit_vectors(lat_rad, lon_rad, math.cos(lat_rad))[0]
+        candidates = np.sort(np.asarray(self.venue_tree.query_ball_point(point, chord), dtype=np.intp))
+        
+        dist = self.haversine_distances(lat, lon, self.venue_lat_rad[candidates],
+                                        self.venue_lon_rad[candidates], self.venue_cos_lat[candidates])
+        inside = dist <= radius_km
+        candidates, dist = candidates[inside], dist[inside]
+        order = np.argsort(dist, kind='stable')
+        return candidates[order], dist[order]
     
     def get_nearby_venues(self, user_id, radius_km=5):
         """Get venues within user's radius with distance scoring"""
@@ -26,23 +67,23 @@ class RecommendationEngine:
         if not user:
             return []
         
-        venues = self.db.get_all_venues()
+        venues = self._load_venue_coordinates()
+        # Closest first == highest distance score
+        within, dist = self._venues_within(user['latitude'], user['longitude'], radius_km)
+        
         nearby = []
+        for i, d in zip(within.tolist(), dist.tolist()):
+            venue = venues[i]
+            nearby.append({
+                'id': venue['id'],
+                'name': venue['name'],
+                'category': venue['category'],
+                'rating': venue['rating'],
+                'distance': round(d, 2),
+                'distance_score': max(0, 1 - (d / radius_km))  # Inverse distance weighting
+            })
         
-        for venue in venues:
-            dist = self.haversine_distance(user['latitude'], user['longitude'], 
-                                          venue['latitude'], venue['longitude'])
-            if dist <= radius_km:
-                nearby.append({
-                    'id': venue['id'],
-                    'name': venue['name'],
-                    'category': venue['category'],
-                    'rating': venue['rating'],
-                    'distance': round(dist, 2),
-                    'distance_score': max(0, 1 - (dist / radius_km))  # Inverse distance weighting
-                })
-        
-        return sorted(nearby, key=lambda x: x['distance_score'], reverse=True)
+        return nearby
     
     # ==================== CONTENT-BASED FILTERING ====================
     def get_user_feature_vector(self, user_id):
@@ -51,7 +92,7 @@ class RecommendationEngine:
         if not user:
             return None
         
-        interests = json.loads(user['interests']) if user['interests'] else []
+        interests = json_list(user['interests'])
         filter_history = self.db.get_user_filter_history(user_id)
         
         # Build feature vector from filters
@@ -207,8 +248,8 @@ class RecommendationEngine:
         if not user1 or not user2:
             return 0
         
-        interests1 = json.loads(user1['interests']) if user1['interests'] else []
-        interests2 = json.loads(user2['interests']) if user2['interests'] else []
+        interests1 = json_list(user1['interests'])
+        interests2 = json_list(user2['interests'])
         
         # Interest overlap
         common = len(set(interests1) & set(interests2))
@@ -244,7 +285,7 @@ class RecommendationEngine:
                 'username': other_user['username'],
                 'bio': other_user['bio'],
                 'profile_pic': other_user['profile_pic'],
-                'interests': json.loads(other_user['interests']) if other_user['interests'] else [],
+                'interests': json_list(other_user['interests']),
                 'compatibility_score': compatibility
             })
         
@@ -0,0 +1,70 @@
+import atexit
+import queue
+import threading
+import time
+from database import Database
+
+class TrackingQueue:
+    """
+    Fire-and-forget writer for tracking events (filter interactions, post views).
+    Endpoints enqueue and return immediately; a daemon thread drains the queue and
+    writes each batch with executemany in one transaction.
+    """
+    BATCH_SIZE = 500
+    BATCH_WINDOW = 0.05  # seconds to keep collecting after the first event of a batch
+    
+    def __init__(self, maxsize=100_000):
+        self.db = Database()
+        self.events = queue.Queue(maxsize=maxsize)
+        self.writer = threading.Thread(target=self._run, name='tracking-writer', daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+    
+    def track_filter(self, user_id, filter_type, filter_value):
+        self._put(('filter', (user_id, filter_type, filter_value)))
+    
+    def track_post_view(self, post_id, user_id, time_spent):
+        self._put(('view', (post_id, user_id, time_spent)))
+    
+    def _put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Writer can't keep up; write inline rather than drop the event
+            self._write([event])
+    
+    def _run(self):
+        while True:
+            batch = [self.events.get()]
+            deadline = time.monotonic() + self.BATCH_WINDOW
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.events.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Error writing tracking events: {str(e)}")
+    
+    def _write(self, batch):
+        filters = [row for kind, row in batch if kind == 'filter']
+        views = [row for kind, row in batch if kind == 'view']
+        if filters:
+            self.db.track_filter_interactions_bulk(filters)
+        if views:
+            self.db.track_post_views_bulk(views)
+    
+    def flush(self):
+        """Write whatever is still queued (called at interpreter exit)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
@@ -2,7 +2,7 @@
 
 import os
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
@@ -21,6 +21,7 @@ class LunaAIAgent:
 
         self.model = None
         self.embed_model = None
+        self.last_response = {}  # Full response dict of the latest chat_stream() call
 
         if api_key:
             try:
@@ -329,6 +330,16 @@ class LunaAIAgent:
     # ---------------------------------------------------------------------
     def chat(self, user_id: str, message: str) -> Tuple[str, Dict]:
         """Main LLM-powered chat handler."""
+        for _ in self.chat_stream(user_id, message):
+            pass
+        return self.last_response["message"], self.last_response
+
+    def chat_stream(self, user_id: str, message: str) -> Iterator[str]:
+        """Streaming variant of chat(): yields reply text chunks as they arrive.
+
+        The full response dict (intent, recs, message...) is left in
+        self.last_response once the generator is exhausted.
+        """
         intent = self.parse_user_intent(message)
 
         response = {
@@ -338,6 +349,7 @@ class LunaAIAgent:
             "itinerary": None,
             "message": ""
         }
+        self.last_response = response
 
         try:
             if intent["action"] == "recommend":
@@ -364,16 +376,26 @@ class LunaAIAgent:
             else:
                 if self.model:
                     result = self.model.generate_content(
-                        f"Answer briefly about nightlife/venues: {message}"
+                        f"Answer briefly about nightlife/venues: {message}",
+                        stream=True,
                     )
-                    response["message"] = result.text
+                    for chunk in result:
+                        response["message"] += chunk.text
+                        yield chunk.text
+                    return
                 else:
                     response["message"] = "Hey! How can I assist you?"
 
         except Exception as e:
-            response["message"] = f"⚠️ Error: {e}"
-
-        return response["message"], response
+            error = f"⚠️ Error: {e}"
+            if response["message"]:
+                # Failed mid-stream: keep the text the caller already rendered
+                error = "\n\n" + error
+            response["message"] += error
+            yield error
+            return
+
+        yield response["message"]
 
     # ---------------------------------------------------------------------
     # FORMAT ITINERARY